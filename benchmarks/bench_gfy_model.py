@@ -0,0 +1,54 @@
+"""
+Per-item memory and construction time of Gfy objects built from feed payloads.
+
+Usage: python -m benchmarks.bench_gfy_model [--items 10000]
+"""
+import gc
+import json
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from gfypy.gfy import Gfy
+
+from benchmarks.fake_api import fake_gfy
+
+
+def decoded_page(items):
+    # decoding from JSON gives every item its own objects, just like a real feed page
+    return json.loads(json.dumps([fake_gfy(f"gfy{i}", i) for i in range(items)]))
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    payloads = decoded_page(args.items)
+    start = time.perf_counter()
+    Gfy.from_dict_list(None, payloads)
+    construction = time.perf_counter() - start
+
+    payloads = decoded_page(args.items)
+    gfys = Gfy.from_dict_list(None, payloads)
+    start = time.perf_counter()
+    for gfy in gfys:
+        gfy.title, gfy.views, gfy.gatekeeper, gfy.create_date
+    access = time.perf_counter() - start
+    del gfys, payloads
+
+    gc.collect()
+    tracemalloc.start()
+    gfys = Gfy.from_dict_list(None, decoded_page(args.items))
+    gc.collect()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{args.items} items")
+    print(f"construction  {construction / args.items * 1e6:8.2f} us/item")
+    print(f"4 attributes  {access / args.items * 1e6:8.2f} us/item")
+    print(f"memory        {memory / len(gfys):8.0f} B/item")
+
+
+if __name__ == "__main__":
+    main()
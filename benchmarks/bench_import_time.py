@@ -0,0 +1,69 @@
+"""
+Import time of the gfypy modules, each measured in a fresh interpreter with -X importtime.
+
+Usage: python -m benchmarks.bench_import_time [--runs 5]
+
+Exits with status 1 if a module pulls in a dependency it shouldn't need yet, e.g. aiohttp for the sync client.
+"""
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+# module -> heavy dependencies that importing it must not load
+MODULES = {
+    "gfypy": ("requests", "aiohttp", "asyncio", "tqdm", "sqlite3"),
+    "gfypy.gfy": ("requests", "aiohttp", "asyncio", "tqdm", "sqlite3"),
+    "gfypy.client.sync_client": ("aiohttp", "asyncio", "tqdm", "sqlite3"),
+    "gfypy.client.async_client": ("requests", "tqdm", "sqlite3"),
+}
+
+
+def measure(module, forbidden):
+    """
+    Returns the cumulative import time of the module in seconds and the forbidden modules it loaded.
+    """
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {forbidden!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+
+    loaded = [name for name in proc.stdout.strip().split(",") if name]
+    return cumulative / 1e6, loaded
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    violations = False
+    for module, forbidden in MODULES.items():
+        runs = [measure(module, forbidden) for _ in range(args.runs)]
+        best = min(elapsed for elapsed, _ in runs)
+        loaded = runs[0][1]
+
+        print(f"{module:28} {best * 1000:8.1f} ms", end="")
+        if loaded:
+            violations = True
+            print(f"   loads {', '.join(loaded)}")
+        else:
+            print()
+
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Decoding time of feed pages with each installed JSON codec.
+
+Usage: python -m benchmarks.bench_json_codec [--pages 200] [--per-page 100] [--page recorded.json ...]
+"""
+import json
+import time
+from argparse import ArgumentParser
+
+from gfypy.http.codec import CODECS
+
+from benchmarks.fake_api import fake_gfy
+
+
+def generated_pages(pages, per_page):
+    return [
+        json.dumps(
+            {
+                "cursor": f"cursor{page}",
+                "gfycats": [
+                    fake_gfy(f"gfy{page}x{i}", page * per_page + i)
+                    for i in range(per_page)
+                ],
+            }
+        ).encode()
+        for page in range(pages)
+    ]
+
+
+def recorded_pages(paths):
+    pages = []
+    for path in paths:
+        with open(path, "rb") as page_file:
+            pages.append(page_file.read())
+    return pages
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument(
+        "--page",
+        nargs="+",
+        help="raw feed responses to decode instead of generated ones",
+    )
+    args = parser.parse_args()
+
+    pages = (
+        recorded_pages(args.page)
+        if args.page
+        else generated_pages(args.pages, args.per_page)
+    )
+    size = sum(len(page) for page in pages)
+    print(f"{len(pages)} pages, {size / len(pages) / 1024:.1f} KiB per page")
+
+    for name, codec in CODECS.items():
+        start = time.perf_counter()
+        for page in pages:
+            codec.loads(page)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"{name:8} {elapsed / len(pages) * 1e6:8.1f} us/page {size / elapsed / 1e6:8.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
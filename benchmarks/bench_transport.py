@@ -0,0 +1,274 @@
+"""
+Concurrent API requests through each transport against a local TLS server that speaks HTTP/1.1 and HTTP/2.
+
+Usage: python -m benchmarks.bench_transport [--requests 1000] [--concurrency 32] [--latency 0.02]
+
+Needs hypercorn and trustme for the server, and httpx with h2 for the HTTP/2 transports:
+pip install hypercorn trustme "httpx[http2]"
+"""
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import ssl
+import tempfile
+import time
+import urllib.request
+from argparse import ArgumentParser
+from collections import Counter
+
+from gfypy import AsyncGfypy, Gfypy, PoolConfig
+from gfypy.route import Route
+
+from benchmarks.fake_api import fake_gfy, write_creds
+
+NO_RATE_LIMITS = {"api": None, "filedrop": None}
+
+
+class GfycatApp:
+    """
+    Serves GET /v1/gfycats/{id} after the given latency, a token for any POST /v1/oauth/token, and
+    GET /stats with the connections and HTTP versions seen since the last call to it.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.connections = set()
+        self.versions = Counter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        # the body has to be read even if it is ignored
+        message = {"more_body": True}
+        while message.get("more_body"):
+            message = await receive()
+
+        if scope["path"] == "/stats":
+            body = json.dumps(
+                {"connections": len(self.connections), "versions": self.versions}
+            )
+            self.connections, self.versions = set(), Counter()
+        elif scope["path"] == "/v1/oauth/token":
+            body = json.dumps(
+                {
+                    "access_token": "access",
+                    "expires_in": 3600,
+                    "refresh_token": "refresh",
+                    "refresh_token_expires_in": 5184000,
+                    "resource_owner": "benchmark",
+                }
+            )
+        else:
+            self.connections.add(tuple(scope["client"]))
+            self.versions[scope["http_version"]] += 1
+            await asyncio.sleep(self.latency)
+            body = json.dumps({"gfyItem": fake_gfy(scope["path"].rsplit("/", 1)[-1])})
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body.encode()})
+
+
+def _serve(port, certfile, keyfile, latency):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.certfile, config.keyfile = certfile, keyfile
+    config.alpn_protocols = ["h2", "http/1.1"]
+    config.accesslog = config.errorlog = None
+    # by default, connections are closed after 1000 requests
+    config.keep_alive_max_requests = 2 ** 31
+    asyncio.run(serve(GfycatApp(latency), config))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serving(cert_file, key_file, latency, ssl_context):
+    """
+    Runs the server in a child process and points the clients at it.
+    """
+    port = free_port()
+    server = multiprocessing.Process(
+        target=_serve, args=(port, cert_file, key_file, latency), daemon=True
+    )
+    server.start()
+
+    base = f"https://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            server_stats(base, ssl_context)
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    route_base, Route.BASE = Route.BASE, base + "/v1"
+    try:
+        yield base
+    finally:
+        Route.BASE = route_base
+        server.terminate()
+        server.join()
+
+
+def server_stats(base, ssl_context):
+    with urllib.request.urlopen(f"{base}/stats", context=ssl_context) as resp:
+        return json.load(resp)
+
+
+def sync_run(transport, args, creds_file):
+    gfypy = Gfypy(
+        "client_id",
+        "client_secret",
+        creds_file,
+        max_workers=args.concurrency,
+        rate_limits=NO_RATE_LIMITS,
+        transport=transport,
+    )
+    gfypy.authenticate()
+    try:
+        return len(gfypy.get_gfycats([f"gfy{i}" for i in range(args.requests)]))
+    finally:
+        gfypy.close()
+
+
+async def async_run(transport, args, creds_file):
+    gfypy = AsyncGfypy(
+        "client_id",
+        "client_secret",
+        creds_file,
+        rate_limits=NO_RATE_LIMITS,
+        transport=transport,
+    )
+    await gfypy.authenticate()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def get(gfy_id):
+        async with semaphore:
+            return await gfypy.get_gfycat(gfy_id)
+
+    try:
+        return len(
+            await asyncio.gather(*(get(f"gfy{i}") for i in range(args.requests)))
+        )
+    finally:
+        await gfypy.close()
+
+
+def requests_transport(args, ca_file, ssl_context):
+    return "requests"
+
+
+def httpx_transport(args, ca_file, ssl_context):
+    from gfypy.http.httpx_transport import HttpxTransport
+
+    return HttpxTransport(pool=PoolConfig(size=args.concurrency), verify=ca_file)
+
+
+def aiohttp_transport(args, ca_file, ssl_context):
+    import aiohttp
+
+    from gfypy.http.async_http import AiohttpTransport
+
+    return AiohttpTransport(connector=aiohttp.TCPConnector(ssl=ssl_context))
+
+
+def async_httpx_transport(http2):
+    def create(args, ca_file, ssl_context):
+        from gfypy.http.httpx_transport import AsyncHttpxTransport
+
+        return AsyncHttpxTransport(
+            http2=http2, pool=PoolConfig(size=args.concurrency), verify=ca_file
+        )
+
+    return create
+
+
+# name -> (run, transport factory); async transports are created inside their event loop
+SCENARIOS = {
+    "sync_requests": (sync_run, requests_transport),
+    "sync_httpx": (sync_run, httpx_transport),
+    "async_aiohttp": (async_run, aiohttp_transport),
+    "async_httpx_http1": (async_run, async_httpx_transport(http2=False)),
+    "async_httpx_http2": (async_run, async_httpx_transport(http2=True)),
+}
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    args = parser.parse_args()
+
+    import trustme
+
+    ca = trustme.CA()
+    cert = ca.issue_cert("127.0.0.1")
+    ssl_context = ssl.create_default_context()
+    ca.configure_trust(ssl_context)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ca_file = os.path.join(tmp_dir, "ca.pem")
+        cert_file = os.path.join(tmp_dir, "cert.pem")
+        key_file = os.path.join(tmp_dir, "key.pem")
+        ca.cert_pem.write_to_path(ca_file)
+        cert.cert_chain_pems[0].write_to_path(cert_file)
+        cert.private_key_pem.write_to_path(key_file)
+        # requests trusts the test CA through the environment
+        os.environ["REQUESTS_CA_BUNDLE"] = ca_file
+
+        print(
+            f"{args.requests} requests, concurrency {args.concurrency},"
+            f" {args.latency * 1000:.0f} ms latency per request"
+        )
+
+        for name in args.scenarios:
+            run, create_transport = SCENARIOS[name]
+            creds_file = os.path.join(tmp_dir, "creds.json")
+            write_creds(creds_file)
+
+            async def run_async():
+                transport = create_transport(args, ca_file, ssl_context)
+                return await run(transport, args, creds_file)
+
+            # a fresh server per scenario, so that connections closed by the previous one don't interfere
+            with serving(cert_file, key_file, args.latency, ssl_context) as base:
+                start = time.perf_counter()
+                if asyncio.iscoroutinefunction(run):
+                    done = asyncio.run(run_async())
+                else:
+                    done = run(
+                        create_transport(args, ca_file, ssl_context), args, creds_file
+                    )
+                elapsed = time.perf_counter() - start
+
+                stats = server_stats(base, ssl_context)
+
+            print(
+                f"{name:20} {done / elapsed:8.1f} requests/s"
+                f"  {stats['connections']:4} connections"
+                f"  ({', '.join(f'HTTP/{v}' for v in stats['versions'])})"
+            )
+
+
+if __name__ == "__main__":
+    main()
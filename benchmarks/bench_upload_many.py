@@ -0,0 +1,75 @@
+"""
+Upload throughput of AsyncGfypy.upload_many against a local fake filedrop server.
+
+Usage: python -m benchmarks.bench_upload_many [--files 50] [--size 1048576] [--latency 0.05]
+"""
+import asyncio
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from gfypy import AsyncGfypy
+
+from benchmarks.fake_api import FakeGfycatApi, point_clients_at, write_creds
+
+
+async def run(files, concurrency, api, tmp_dir):
+    creds_file = os.path.join(tmp_dir, f"creds_{concurrency}.json")
+    write_creds(creds_file)
+
+    with point_clients_at(api):
+        gfypy = AsyncGfypy("client_id", "client_secret", creds_file)
+        await gfypy.authenticate()
+
+        start = time.perf_counter()
+        results = [
+            result
+            async for result in gfypy.upload_many(
+                files, concurrency=concurrency, title="Benchmark"
+            )
+        ]
+        elapsed = time.perf_counter() - start
+
+        await gfypy.close()
+
+    failed = sum(1 for result in results if not result.ok)
+    return elapsed, failed
+
+
+async def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--size", type=int, default=1024 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    api = FakeGfycatApi(latency=args.latency)
+    await api.start()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for i in range(args.files):
+            path = os.path.join(tmp_dir, f"clip-{i}.mp4")
+            with open(path, "wb") as file:
+                file.write(os.urandom(args.size))
+            files.append(path)
+
+        print(
+            f"{args.files} files of {args.size} bytes, {args.latency * 1000:.0f} ms latency per request"
+        )
+        for concurrency in args.concurrency:
+            elapsed, failed = await run(files, concurrency, api, tmp_dir)
+            print(
+                f"concurrency={concurrency:<4} {elapsed:8.2f} s  "
+                f"{args.files / elapsed:8.1f} files/s  "
+                f"{args.files * args.size / elapsed / 1024 ** 2:8.1f} MiB/s  "
+                f"failed={failed}"
+            )
+
+    await api.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
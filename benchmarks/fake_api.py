@@ -0,0 +1,489 @@
+"""
+A local stand-in for the Gfycat API and filedrop so that the clients can be benchmarked without credentials.
+"""
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from threading import Thread
+
+from aiohttp import web
+
+import gfypy.client.async_client
+import gfypy.client.sync_client
+from gfypy.route import Route
+
+
+def fake_gfy(gfy_id, number=0):
+    return {
+        "gfyId": gfy_id,
+        "gfyName": gfy_id,
+        "gfyNumber": str(number),
+        "title": f"Fake gfy {number}",
+        "tags": ["fake", "benchmark"],
+        "likes": "0",
+        "dislikes": "0",
+        "views": number,
+        "gatekeeper": 0,
+        "createDate": 1600000000 + number,
+        "width": 1280,
+        "height": 720,
+        "mp4Size": 1000000,
+        "webmSize": 500000,
+        "md5": "d41d8cd98f00b204e9800998ecf8427e",
+        "mp4Url": f"https://giant.gfycat.com/{gfy_id}.mp4",
+        "webmUrl": f"https://giant.gfycat.com/{gfy_id}.webm",
+        "content_urls": {
+            "mp4": {
+                "url": f"https://giant.gfycat.com/{gfy_id}.mp4",
+                "size": 1000000,
+                "height": 720,
+                "width": 1280,
+            },
+            "webm": {
+                "url": f"https://giant.gfycat.com/{gfy_id}.webm",
+                "size": 500000,
+                "height": 720,
+                "width": 1280,
+            },
+        },
+        "userData": {"username": "benchmark", "followers": 0},
+    }
+
+
+class FakeGfycatApi:
+    def __init__(
+        self,
+        latency=0.0,
+        encoding_checks=0,
+        token_lifetime=3600,
+        feed_size=1000,
+        followers=100,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        unauthorized_rate=0.0,
+        retry_after=0.1,
+        media_size=1000000,
+        seed=None,
+    ):
+        # kept to start an identical server in another process
+        self._options = {
+            "latency": latency,
+            "encoding_checks": encoding_checks,
+            "token_lifetime": token_lifetime,
+            "feed_size": feed_size,
+            "followers": followers,
+            "error_rate": error_rate,
+            "throttle_rate": throttle_rate,
+            "unauthorized_rate": unauthorized_rate,
+            "retry_after": retry_after,
+            "media_size": media_size,
+            "seed": seed,
+        }
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        # every gfy has the same renditions; webm is half the size of mp4
+        self._media = {
+            ".mp4": self._random_bytes(media_size),
+            ".webm": self._random_bytes(media_size // 2),
+        }
+        self._media_md5 = hashlib.md5(self._media[".mp4"]).hexdigest()
+        self.followers = followers
+        self.feed_size = feed_size
+        self.encoding_checks = encoding_checks
+        self.token_lifetime = token_lifetime
+        self.counts = {}
+        self.uploaded = []
+        self.titles = {}
+        self.tags = {}
+        self.deleted = set()
+        self._status_checks = {}
+        self._tokens = {}
+        self._keys = itertools.count()
+        self._runner = None
+        self.url = None
+
+        self.app = web.Application(
+            client_max_size=1024 ** 3, middlewares=[self._inject_faults]
+        )
+        self.app.router.add_post("/v1/oauth/token", self.oauth_token)
+        self.app.router.add_get("/v1/me/gfycats", self.feed)
+        self.app.router.add_get("/v1/users/{user_id}/gfycats", self.feed)
+        self.app.router.add_post("/v1/gfycats", self.create_key)
+        self.app.router.add_get("/v1/gfycats/fetch/status/{key}", self.fetch_status)
+        self.app.router.add_get("/v1/gfycats/{id}", self.get_gfycat)
+        self.app.router.add_put("/v1/me/gfycats/{id}/title", self.set_title)
+        self.app.router.add_delete("/v1/me/gfycats/{id}/title", self.delete_title)
+        self.app.router.add_put("/v1/me/gfycats/{id}/tags", self.set_tags)
+        self.app.router.add_delete("/v1/me/gfycats/{id}", self.delete_gfycat)
+        self.app.router.add_get("/v1/me/followers", self.get_followers)
+        self.app.router.add_get("/v1/users/{id}", self.get_user)
+        self.app.router.add_post("/filedrop/", self.filedrop)
+        self.app.router.add_get("/media/{name}", self.media)
+
+    def _random_bytes(self, size):
+        # Random.randbytes needs Python 3.9, and getrandbits(0) fails before 3.9
+        if not size:
+            return b""
+        return self._random.getrandbits(8 * size).to_bytes(size, "little")
+
+    @property
+    def api_base(self):
+        return self.url + "/v1"
+
+    @property
+    def filedrop_endpoint(self):
+        return self.url + "/filedrop/"
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    @contextlib.contextmanager
+    def run_in_thread(self):
+        """
+        Serves the fake API from a background event loop, e.g. for the synchronous client.
+        """
+        loop = asyncio.new_event_loop()
+        thread = Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+        try:
+            yield self
+        finally:
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+
+    @contextlib.contextmanager
+    def run_in_process(self):
+        """
+        Serves an identically configured fake API from a child process, so that the server's CPU time and
+        allocations don't count towards the client being measured. The child's state, e.g. counts, isn't
+        shared back.
+        """
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_serve, args=(self._options, child_conn), daemon=True
+        )
+        process.start()
+        try:
+            self.url = parent_conn.recv()
+            yield self
+        finally:
+            process.terminate()
+            process.join()
+
+    @web.middleware
+    async def _inject_faults(self, request, handler):
+        """
+        Fails the given share of API requests with a 429, a 503 or, for authenticated requests, a 401 that
+        also revokes the access token.
+        """
+        if request.path.startswith("/v1/") and request.path != "/v1/oauth/token":
+            roll = self._random.random()
+
+            if roll < self.throttle_rate:
+                await self._handle("injected_429")
+                return self._json(
+                    {"errorMessage": "Too many requests"},
+                    status=429,
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            roll -= self.throttle_rate
+
+            if roll < self.error_rate:
+                await self._handle("injected_503")
+                return self._json({"errorMessage": "Unavailable"}, status=503)
+            roll -= self.error_rate
+
+            if roll < self.unauthorized_rate and "authorization" in request.headers:
+                await self._handle("injected_401")
+                token = request.headers["authorization"].partition(" ")[2]
+                self._tokens.pop(token, None)
+                return self._unauthorized()
+
+        return await handler(request)
+
+    async def _handle(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _authorized(self, request):
+        token = request.headers.get("authorization", "").partition(" ")[2]
+        return self._tokens.get(token, 0) > time.time()
+
+    def _unauthorized(self):
+        return self._json(
+            {
+                "errorMessage": {
+                    "code": "Unauthorized",
+                    "description": "The access token is invalid or has expired",
+                }
+            },
+            status=401,
+        )
+
+    @staticmethod
+    def _json(payload, status=200, headers=None):
+        return web.Response(
+            body=json.dumps(payload),
+            status=status,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def _gfy(self, gfy_id, number=0):
+        """
+        A fake gfy whose mp4 and webm renditions are served by the fake API.
+        """
+        gfy = fake_gfy(gfy_id, number)
+
+        for name in ("mp4", "webm"):
+            url = f"{self.url}/media/{gfy_id}.{name}"
+            size = len(self._media[f".{name}"])
+            gfy[f"{name}Url"] = gfy["content_urls"][name]["url"] = url
+            gfy[f"{name}Size"] = gfy["content_urls"][name]["size"] = size
+        gfy["md5"] = self._media_md5
+
+        return gfy
+
+    async def oauth_token(self, request):
+        await self._handle("oauth_token")
+
+        access_token = f"access-{next(self._keys)}"
+        self._tokens[access_token] = time.time() + self.token_lifetime
+
+        return self._json(
+            {
+                "access_token": access_token,
+                "expires_in": self.token_lifetime,
+                "refresh_token": f"refresh-{time.time()}",
+                "refresh_token_expires_in": 5184000,
+                "resource_owner": "benchmark",
+            }
+        )
+
+    async def feed(self, request):
+        await self._handle("feed")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        # newest first; the cursor is simply the offset of the next page
+        count = int(request.query.get("count", 100))
+        offset = int(request.query.get("cursor") or 0)
+        numbers = range(
+            self.feed_size - 1 - offset,
+            max(self.feed_size - 1 - offset - count, -1),
+            -1,
+        )
+        next_offset = offset + count
+
+        return self._json(
+            {
+                "cursor": str(next_offset) if next_offset < self.feed_size else "",
+                "gfycats": [self._gfy(f"gfy{number}", number) for number in numbers],
+            }
+        )
+
+    async def create_key(self, request):
+        await self._handle("create_key")
+        return self._json({"isOk": True, "gfyname": f"fakegfy{next(self._keys)}"})
+
+    async def fetch_status(self, request):
+        await self._handle("fetch_status")
+        key = request.match_info["key"]
+
+        self._status_checks[key] = self._status_checks.get(key, 0) + 1
+        if self._status_checks[key] <= self.encoding_checks:
+            return self._json({"task": "encoding", "time": 1})
+
+        return self._json({"task": "complete", "gfyname": key})
+
+    async def get_gfycat(self, request):
+        await self._handle("get_gfycat")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        gfy_id = request.match_info["id"]
+        if gfy_id in self.deleted:
+            return self._json({"errorMessage": "Not found"}, status=404)
+
+        gfy = self._gfy(gfy_id)
+        if gfy_id in self.titles:
+            gfy["title"] = self.titles[gfy_id]
+
+        body = json.dumps({"gfyItem": gfy})
+        etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+        if request.headers.get("if-none-match") == etag:
+            return web.Response(status=304, headers={"etag": etag})
+
+        return web.Response(
+            body=body, content_type="application/json", headers={"etag": etag}
+        )
+
+    async def set_title(self, request):
+        await self._handle("set_title")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        payload = json.loads(await request.text())
+        self.titles[request.match_info["id"]] = payload["value"]
+        return web.Response(status=200)
+
+    async def set_tags(self, request):
+        await self._handle("set_tags")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        payload = json.loads(await request.text())
+        self.tags[request.match_info["id"]] = payload["value"]
+        return web.Response(status=200)
+
+    async def delete_title(self, request):
+        await self._handle("delete_title")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        self.titles[request.match_info["id"]] = ""
+        return web.Response(status=200)
+
+    async def delete_gfycat(self, request):
+        await self._handle("delete_gfycat")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        self.deleted.add(request.match_info["id"])
+        return web.Response(status=200)
+
+    async def get_followers(self, request):
+        await self._handle("get_followers")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        return self._json(
+            {
+                "followers": [
+                    {"follower_id": f"user{i}", "follow_date": 1600000000 + i}
+                    for i in range(self.followers)
+                ]
+            }
+        )
+
+    async def get_user(self, request):
+        await self._handle("get_user")
+        if not self._authorized(request):
+            return self._unauthorized()
+
+        user_id = request.match_info["id"]
+        # like the real API, the content type comes with a charset
+        return web.Response(
+            text=json.dumps({"userid": user_id, "username": user_id, "followers": 0}),
+            content_type="application/json",
+            charset="utf-8",
+        )
+
+    async def filedrop(self, request):
+        await self._handle("filedrop")
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "key":
+                self.uploaded.append(await part.text())
+            else:
+                while await part.read_chunk():
+                    pass
+        return web.Response(status=200)
+
+    async def media(self, request):
+        """
+        Serves renditions with support for Range requests. Like API requests, error_rate of them fail: they
+        are cut off halfway through.
+        """
+        await self._handle("media")
+        body = self._media.get(os.path.splitext(request.match_info["name"])[1])
+        if body is None:
+            return self._json({"errorMessage": "Not found"}, status=404)
+
+        start, status, headers = 0, 200, {"accept-ranges": "bytes"}
+        if "range" in request.headers:
+            start = int(request.headers["range"].partition("=")[2].partition("-")[0])
+            if start >= len(body):
+                return web.Response(
+                    status=416, headers={"content-range": f"bytes */{len(body)}"}
+                )
+
+            status = 206
+            headers["content-range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+
+        if self._random.random() < self.error_rate:
+            await self._handle("injected_interruption")
+            response = web.StreamResponse(status=status, headers=headers)
+            response.content_length = len(body) - start
+            await response.prepare(request)
+            half = start + (len(body) - start) // 2
+            await response.write(body[start:half])
+            request.transport.close()
+            return response
+
+        return web.Response(status=status, body=body[start:], headers=headers)
+
+
+def _serve(options, conn):
+    loop = asyncio.new_event_loop()
+    api = FakeGfycatApi(**options)
+    loop.run_until_complete(api.start())
+    conn.send(api.url)
+    loop.run_forever()
+
+
+@contextlib.contextmanager
+def point_clients_at(api):
+    """
+    Redirects all API and filedrop requests of both clients to the fake API.
+    """
+    base, async_filedrop, sync_filedrop = (
+        Route.BASE,
+        gfypy.client.async_client.FILEDROP_ENDPOINT,
+        gfypy.client.sync_client.FILEDROP_ENDPOINT,
+    )
+    Route.BASE = api.api_base
+    gfypy.client.async_client.FILEDROP_ENDPOINT = api.filedrop_endpoint
+    gfypy.client.sync_client.FILEDROP_ENDPOINT = api.filedrop_endpoint
+    try:
+        yield api
+    finally:
+        Route.BASE = base
+        gfypy.client.async_client.FILEDROP_ENDPOINT = async_filedrop
+        gfypy.client.sync_client.FILEDROP_ENDPOINT = sync_filedrop
+
+
+def write_creds(path):
+    with open(path, "w") as creds_file:
+        creds_file.write(
+            json.dumps(
+                {
+                    "access_token": "access",
+                    "expires_in": 3600,
+                    "refresh_token": "refresh",
+                    "refresh_token_expires_in": 5184000,
+                    "resource_owner": "benchmark",
+                }
+            )
+        )
@@ -0,0 +1,258 @@
+"""
+Feed crawl, upload and download throughput and memory of Gfypy and AsyncGfypy against a local fake Gfycat API.
+
+Usage: python -m benchmarks.suite [--feed-size 5000] [--files 16] [--latency 0.005] [--error-rate 0.01]
+                                  [--output results.json] [--compare benchmarks/results/0.3.0.json]
+
+Results are stored in benchmarks/results/<gfypy version>.json by default, so that a later run can be compared
+against them with --compare.
+"""
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime
+from pathlib import Path
+
+from gfypy import AsyncGfypy, Gfypy, RenditionPolicy, __version__
+
+from benchmarks.fake_api import FakeGfycatApi, point_clients_at, write_creds
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# the fake API answers instantly, so client-side rate limiting would dominate every result
+NO_RATE_LIMITS = {"api": None, "filedrop": None}
+# the fake mp4 renditions are --size bytes and come with an md5
+MP4_ONLY = RenditionPolicy(formats=("mp4",), verify_md5=True)
+
+
+def sync_client(tmp_dir):
+    creds_file = os.path.join(tmp_dir, "creds_sync.json")
+    write_creds(creds_file)
+    gfypy = Gfypy("client_id", "client_secret", creds_file, rate_limits=NO_RATE_LIMITS)
+    gfypy.authenticate()
+    return gfypy
+
+
+async def async_client(tmp_dir):
+    creds_file = os.path.join(tmp_dir, "creds_async.json")
+    write_creds(creds_file)
+    gfypy = AsyncGfypy(
+        "client_id", "client_secret", creds_file, rate_limits=NO_RATE_LIMITS
+    )
+    await gfypy.authenticate()
+    return gfypy
+
+
+def crawl_sync(args, tmp_dir):
+    gfypy = sync_client(tmp_dir)
+    try:
+        return len(gfypy.get_own_feed(limit=-1))
+    finally:
+        gfypy.close()
+
+
+async def crawl_async(args, tmp_dir, prefetch=0):
+    gfypy = await async_client(tmp_dir)
+    try:
+        return len(await gfypy.get_own_feed(limit=-1, prefetch=prefetch))
+    finally:
+        await gfypy.close()
+
+
+def upload_sync(args, tmp_dir):
+    gfypy = sync_client(tmp_dir)
+    try:
+        results = gfypy.upload_many(args.upload_files, concurrency=args.concurrency)
+        return sum(1 for result in results if result.ok)
+    finally:
+        gfypy.close()
+
+
+async def upload_async(args, tmp_dir):
+    gfypy = await async_client(tmp_dir)
+    try:
+        results = gfypy.upload_many(args.upload_files, concurrency=args.concurrency)
+        return len([result async for result in results if result.ok])
+    finally:
+        await gfypy.close()
+
+
+def download_sync(args, tmp_dir):
+    gfypy = sync_client(tmp_dir)
+    try:
+        results = gfypy.download_many(
+            [f"gfy{i}" for i in range(args.files)],
+            tempfile.mkdtemp(dir=tmp_dir),
+            MP4_ONLY,
+            concurrency=args.concurrency,
+        )
+        return sum(1 for result in results if result.ok)
+    finally:
+        gfypy.close()
+
+
+async def download_async(args, tmp_dir):
+    gfypy = await async_client(tmp_dir)
+    try:
+        results = gfypy.download_many(
+            [f"gfy{i}" for i in range(args.files)],
+            tempfile.mkdtemp(dir=tmp_dir),
+            MP4_ONLY,
+            concurrency=args.concurrency,
+        )
+        return len([result async for result in results if result.ok])
+    finally:
+        await gfypy.close()
+
+
+SCENARIOS = {
+    "crawl_sync": (crawl_sync, "pages"),
+    "crawl_async": (crawl_async, "pages"),
+    "crawl_async_prefetch": (
+        lambda args, tmp_dir: crawl_async(args, tmp_dir, prefetch=2),
+        "pages",
+    ),
+    "upload_sync": (upload_sync, "MiB"),
+    "upload_async": (upload_async, "MiB"),
+    "download_sync": (download_sync, "MiB"),
+    "download_async": (download_async, "MiB"),
+}
+
+
+def run_scenario(name, args, tmp_dir):
+    func, unit = SCENARIOS[name]
+
+    def call():
+        result = func(args, tmp_dir)
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+        return result
+
+    start = time.perf_counter()
+    done = call()
+    elapsed = time.perf_counter() - start
+
+    # measured in a second run, since tracing allocations slows everything down
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if unit == "pages":
+        amount = done / 100
+    else:
+        amount = done * args.size / 1024 ** 2
+
+    return {
+        "completed": done,
+        "elapsed": elapsed,
+        "rate": amount / elapsed,
+        "unit": f"{unit}/s",
+        "peak_memory": peak,
+    }
+
+
+def compare(results, options, previous):
+    print(f"\ncompared to gfypy {previous['version']} ({previous['created']})")
+    changed = sorted(
+        key
+        for key in options
+        if key != "scenarios" and options[key] != previous["options"].get(key)
+    )
+    if changed:
+        print(f"note: the runs used different {', '.join(changed)}")
+
+    for name, result in results.items():
+        old = previous["results"].get(name)
+        if old is None:
+            continue
+
+        print(
+            f"{name:22} rate {(result['rate'] / old['rate'] - 1) * 100:+7.1f}%"
+            f"   peak memory {(result['peak_memory'] / old['peak_memory'] - 1) * 100:+7.1f}%"
+        )
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--feed-size", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size", type=int, default=1024 * 1024)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--output", type=Path, default=RESULTS_DIR / f"{__version__}.json"
+    )
+    parser.add_argument("--compare", type=Path)
+    args = parser.parse_args()
+
+    api = FakeGfycatApi(
+        latency=args.latency,
+        feed_size=args.feed_size,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        retry_after=0.05,
+        media_size=args.size,
+        seed=args.seed,
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        args.upload_files = []
+        for i in range(args.files):
+            path = os.path.join(tmp_dir, f"clip-{i}.mp4")
+            with open(path, "wb") as file:
+                file.write(os.urandom(args.size))
+            args.upload_files.append(path)
+
+        with api.run_in_process(), point_clients_at(api):
+            for name in args.scenarios:
+                results[name] = run_scenario(name, args, tmp_dir)
+
+    print(f"\ngfypy {__version__}, {args.latency * 1000:.0f} ms latency per request")
+    for name, result in results.items():
+        print(
+            f"{name:22} {result['rate']:8.1f} {result['unit']:8}"
+            f" {result['peak_memory'] / 1024**2:7.1f} MiB peak"
+            f"  ({result['completed']} completed)"
+        )
+
+    options = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "compare", "upload_files")
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(
+            {
+                "version": __version__,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "options": options,
+                "results": results,
+            },
+            output_file,
+            indent=2,
+        )
+    print(f"\nstored in {args.output}")
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            compare(results, options, json.load(previous_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,52 @@
-from .client import Gfypy
+from ._lazy import lazy_attributes
+from .version import __version__
 
-try:
-    from .client import AsyncGfypy
-except ImportError:
-    pass
+# the clients pull in requests, tqdm and aiohttp, so every name is only imported on first access
+_LAZY_ATTRIBUTES = {
+    "aclosing": ".helpers",
+    "AsyncGfypy": ".client.async_client",
+    "BulkReport": ".result",
+    "BulkResult": ".result",
+    "DownloadResult": ".result",
+    "Gfypy": ".client.sync_client",
+    "GfypyApiException": ".exceptions",
+    "GfypyAuthException": ".exceptions",
+    "GfypyException": ".exceptions",
+    "Gfy": ".gfy",
+    "is_pending": ".helpers",
+    "Metrics": ".http.metrics",
+    "PoolConfig": ".http.pool",
+    "RenditionPolicy": ".download",
+    "ResponseCache": ".http.cache",
+    "RetryPolicy": ".http.retry",
+    "UploadResult": ".result",
+    "User": ".user",
+}
+# names that need an extra, which may not be installed
+_OPTIONAL_ATTRIBUTES = {"AsyncGfypy": "async"}
 
-from .exceptions import GfypyApiException, GfypyAuthException, GfypyException
-from .gfy import Gfy
-from .helpers import is_pending
-from .user import User
-from .version import __version__
+__getattr__, __dir__ = lazy_attributes(
+    globals(), _LAZY_ATTRIBUTES, _OPTIONAL_ATTRIBUTES
+)
 
 __all__ = [
+    "aclosing",
     "AsyncGfypy",
+    "BulkReport",
+    "BulkResult",
+    "DownloadResult",
     "Gfypy",
     "GfypyApiException",
     "GfypyAuthException",
     "GfypyException",
     "Gfy",
     "is_pending",
+    "Metrics",
+    "PoolConfig",
+    "RenditionPolicy",
+    "ResponseCache",
+    "RetryPolicy",
+    "UploadResult",
     "User",
     "__version__",
 ]
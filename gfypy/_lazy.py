@@ -0,0 +1,37 @@
+import importlib
+
+
+def lazy_attributes(module_globals, attributes, optional=None):
+    """
+    Returns the __getattr__ and __dir__ of a package that imports each of attributes, a mapping of name ->
+    relative module, on first access. optional maps the names that need an extra, which may not be installed,
+    to that extra.
+    """
+    package = module_globals["__name__"]
+    optional = optional or {}
+
+    def __getattr__(name):
+        try:
+            module = attributes[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            ) from None
+
+        try:
+            value = getattr(importlib.import_module(module, package), name)
+        except ImportError as e:
+            if name not in optional:
+                raise
+            # like a missing attribute, so that hasattr() works without the extra
+            raise AttributeError(
+                f"{name} needs {e.name}, which is installed by pip install gfypy[{optional[name]}]."
+            ) from e
+
+        module_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted({*module_globals, *attributes})
+
+    return __getattr__, __dir__
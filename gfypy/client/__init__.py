@@ -1,9 +1,14 @@
-try:
-    from .async_client import AsyncGfypy
-except ImportError:
-    pass
+from .._lazy import lazy_attributes
 
-from .sync_client import Gfypy
+_LAZY_ATTRIBUTES = {
+    "AsyncGfypy": ".async_client",
+    "Gfypy": ".sync_client",
+}
+# names that need an extra, which may not be installed
+_OPTIONAL_ATTRIBUTES = {"AsyncGfypy": "async"}
 
+__getattr__, __dir__ = lazy_attributes(
+    globals(), _LAZY_ATTRIBUTES, _OPTIONAL_ATTRIBUTES
+)
 
 __all__ = ["AsyncGfypy", "Gfypy"]
@@ -1,19 +1,22 @@
-import asyncio
 import inspect
-import json
+import logging
+import os
 import time
-import webbrowser
-from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from threading import Thread
-from urllib.parse import urlparse, urlencode
+from urllib.parse import urlencode
 
 from gfypy.const import AUTH_ENDPOINT, REDIRECT_URI
+from gfypy.credentials import CredentialStore
+from gfypy.download import RenditionPolicy
 from gfypy.exceptions import GfypyException
 from gfypy.gfy import Gfy
+from gfypy.http.multipart import MultipartEncoder
 from gfypy.route import Route
 from gfypy.user import User
 
+logger = logging.getLogger(__name__)
+
 
 class Promise:
     def __init__(self, coro):
@@ -23,6 +26,8 @@ class Promise:
     def __await__(self):
         if self._is_coro:
             return self.coro.__await__()
+        import asyncio
+
         return asyncio.sleep(0, result=self.coro).__await__()
 
     def then(self, later):
@@ -37,28 +42,40 @@ class Promise:
             return later(self.coro)
 
 
-class AuthCallbackRequestHandler(SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(bytes("<h2>You may close this window now!</h2>", "UTF-8"))
-        query = urlparse(self.path).query
-        query_components = dict(qc.split("=") for qc in query.split("&"))
-        code = query_components["code"]
-        self.server.code = code
-
-
 class AbstractGfypy:
     MAX_TAGS = 20
-    MAX_CHECKS = 30
+    # seconds for which the status of an upload is checked before it is assumed to be complete
+    MAX_CHECK_TIME = 90
+    # how many followers the async client queues on top of the ones being fetched, so that a slow one doesn't
+    # leave the concurrent requests idle
+    FOLLOWERS_AHEAD = 8
 
-    def __init__(self, client_id, client_secret, auth_file_path, headless=False):
+    def __init__(
+        self, client_id, client_secret, auth_file_path, headless=False, feed_cache=None
+    ):
         self._client_id = client_id
         self._client_secret = client_secret
         self._auth_file_path = Path(auth_file_path)
+        self._credential_store = CredentialStore(self._auth_file_path)
         self._headless = headless
 
+        # a path creates a cache that is owned, and closed, by this client
+        self._owns_feed_cache = isinstance(feed_cache, (str, os.PathLike))
+        if self._owns_feed_cache:
+            # sqlite3 is only imported by clients that use a cache
+            from gfypy.feed_cache import FeedCache
+
+            feed_cache = FeedCache(feed_cache)
+        self._feed_cache = feed_cache
+
+    @property
+    def stats(self):
+        return self._http.stats
+
+    @property
+    def metrics(self):
+        return self._http.metrics
+
     def _get_oauth_code(self):
         """
         Gets authorization token
@@ -79,6 +96,12 @@ class AbstractGfypy:
                 f"code from the code param (?code=...).\n{auth_url}\nCode: "
             )
         else:
+            # only needed for the interactive login, so they aren't imported with the client
+            import webbrowser
+            from http.server import ThreadingHTTPServer
+
+            from gfypy.client.oauth_callback import AuthCallbackRequestHandler
+
             server = ThreadingHTTPServer(
                 ("localhost", 8000), AuthCallbackRequestHandler
             )
@@ -98,9 +121,35 @@ class AbstractGfypy:
 
             return server.code
 
+    def _auth_from_disk(self):
+        """
+        Loads the persisted credentials. Returns whether their access token is still valid and can be used
+        without refreshing it first.
+        """
+        creds = self._credential_store.load()
+
+        if creds is None:
+            logger.info(
+                'Credentials file "%s" does not exist. Creating it now.',
+                self._auth_file_path,
+            )
+            self._auth_to_disk()
+            creds = self._credential_store.load()
+
+        # credentials persisted without their absolute expiry can't be trusted to still be valid
+        has_expiry = creds.get("expires_at") is not None
+
+        self._http.creds = creds
+        self._http.credential_store = self._credential_store
+
+        if creds.get("access_token") and has_expiry:
+            self._http.auth = creds["access_token"]
+            return not self._http.token_expiring
+
+        return False
+
     def _auth_to_disk(self):
-        with open(self._auth_file_path, "w") as auth_file:
-            auth_file.write(json.dumps(self._http.creds))
+        self._credential_store.save(self._http.creds)
 
     def _check_upload_status(self, gfy_key):
         return self._http.request(
@@ -108,7 +157,7 @@ class AbstractGfypy:
         )
 
     def get_me(self):
-        return Promise(self._http.request(Route("GET", "/me"))).then(
+        return Promise(self._http.request(Route("GET", "/me"), cache=True)).then(
             lambda r: User.from_dict(self._http, r)
         )
 
@@ -130,11 +179,51 @@ class AbstractGfypy:
         return Promise(
             self._http.request(
                 Route("POST", "/gfycats"),
-                data=json.dumps(payload),
-                headers={"content-type": "application/json"},
+                json=payload,
             )
         ).then(lambda r: r["gfyname"])
 
+    @staticmethod
+    def _upload_body(key, source, size=None, callback=None):
+        """
+        Wraps source in a multipart body for the filedrop. Bytes-like sources and streams are sent as they are.
+        """
+        file = (key, source) if size is None else (key, source, size)
+        return MultipartEncoder(
+            fields={"key": key}, files={"file": file}, callback=callback
+        )
+
+    def _close_feed_cache(self):
+        if self._owns_feed_cache:
+            self._feed_cache.close()
+
+    def _start_feed_sync(self, user_id, full):
+        if self._feed_cache is None:
+            raise GfypyException("No feed cache has been configured.")
+
+        return self._feed_cache.sync(user_id, full)
+
+    def _use_feed_cache(self, use_cache, cursor):
+        return self._feed_cache is not None and use_cache and not cursor
+
+    def _cached_feed(self, user_id):
+        return self._feed_cache.gfys(self._http, user_id)
+
+    @staticmethod
+    def _collect_cached_feed(gfys, limit, collector):
+        for scanned, gfy in enumerate(gfys, 1):
+            if not collector.add(gfy) or scanned >= limit >= 0:
+                break
+
+        return collector.result()
+
+    @staticmethod
+    def _feed_route(user_id):
+        if user_id is None:
+            return Route("GET", "/me/gfycats")
+
+        return Route("GET", "/users/{id}/gfycats", id=user_id)
+
     def get_user_feed(self, user_id, **kwargs):
         raise NotImplementedError
 
@@ -142,11 +231,125 @@ class AbstractGfypy:
         return self.get_user_feed(**kwargs)
 
     def get_gfycat(self, _id):
-        return Promise(self._http.request(Route("GET", "/gfycats/{id}", id=_id))).then(
-            lambda r: Gfy.from_dict(self._http, r["gfyItem"])
-        )
+        return Promise(
+            self._http.request(Route("GET", "/gfycats/{id}", id=_id), cache=True)
+        ).then(lambda r: Gfy.from_dict(self._http, r["gfyItem"]))
 
     def get_user(self, _id):
-        return Promise(self._http.request(Route("GET", "/users/{id}", id=_id))).then(
-            lambda r: User.from_dict(self._http, json.loads(r))
+        return Promise(
+            self._http.request(Route("GET", "/users/{id}", id=_id), cache=True)
+        ).then(lambda r: User.from_dict(self._http, self._user_payload(r)))
+
+    def _user_payload(self, resp):
+        # the users endpoint doesn't always declare its JSON content type
+        return resp if isinstance(resp, dict) else self._http.codec.loads(resp)
+
+    @staticmethod
+    def _upload_kwargs(item, kwargs):
+        upload_kwargs = dict(kwargs)
+        if isinstance(item, dict):
+            upload_kwargs.update(item)
+        else:
+            upload_kwargs["filename"] = item
+
+        return upload_kwargs
+
+    def download(self, gfy, directory=".", policy=None):
+        """
+        Downloads the rendition of a gfy, given as a Gfy object or id, that policy chooses (by default a
+        RenditionPolicy, i.e. the smaller of mp4 and webm) to directory/<gfy id><extension> and returns the
+        path. Files that have been downloaded already are skipped and interrupted downloads are resumed.
+        """
+        if not isinstance(gfy, Gfy):
+            gfy = self.get_gfycat(gfy)
+
+        return Promise(gfy).then(lambda gfy: self._download(gfy, directory, policy))
+
+    def _download(self, gfy, directory, policy):
+        rendition = (policy or RenditionPolicy()).choose(gfy)
+        if rendition is None:
+            raise GfypyException(
+                f"{gfy.gfy_id} has no rendition that the policy accepts."
+            )
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, gfy.gfy_id + rendition.extension)
+
+        return self._http.download(rendition.url, path, rendition.size, rendition.md5)
+
+    def _as_gfy(self, item):
+        """
+        Bulk operations take gfys or ids; ids are wrapped so that the Gfy methods can be used on them.
+        """
+        if isinstance(item, Gfy):
+            return item
+
+        return Gfy.from_dict(self._http, {"gfyId": item})
+
+    def bulk_set_title(self, items, title, concurrency=4, journal=None):
+        """
+        Sets the title of many gfys, given as Gfy objects or ids, and returns a BulkReport.
+        Pass a journal path to be able to resume an interrupted run; gfys it lists as done are skipped.
+        """
+        return self._bulk(
+            "set_title", items, lambda gfy: gfy.set_title(title), concurrency, journal
+        )
+
+    def bulk_set_tags(self, items, tags, concurrency=4, journal=None):
+        return self._bulk(
+            "set_tags", items, lambda gfy: gfy.set_tags(tags), concurrency, journal
         )
+
+    def bulk_delete_title(self, items, concurrency=4, journal=None):
+        return self._bulk(
+            "delete_title", items, lambda gfy: gfy.delete_title(), concurrency, journal
+        )
+
+    def bulk_delete(self, items, concurrency=4, journal=None):
+        return self._bulk(
+            "delete", items, lambda gfy: gfy.delete(), concurrency, journal
+        )
+
+    def _bulk(self, operation, items, action, concurrency, journal):
+        raise NotImplementedError
+
+    def _pending_bulk_items(self, report, items, journal):
+        """
+        Returns (item, gfy) pairs for the items that still need to be done and adds the others to
+        report.skipped.
+        """
+        pending = []
+
+        for item in items:
+            gfy = self._as_gfy(item)
+
+            if journal is not None and gfy.gfy_id in journal:
+                report.skipped.append(item)
+            else:
+                pending.append((item, gfy))
+
+        return pending
+
+    def _get_follower_list(self):
+        return Promise(self._http.request(Route("GET", "/me/followers"))).then(
+            lambda r: self._unique_followers(r["followers"])
+        )
+
+    @staticmethod
+    def _unique_followers(followers):
+        seen = set()
+        unique = []
+
+        for follower in followers:
+            if follower["follower_id"] not in seen:
+                seen.add(follower["follower_id"])
+                unique.append(follower)
+
+        return unique
+
+    def _hydrate_follower(self, follower):
+        def add_follow_date(user):
+            user["follow_date"] = follower["follow_date"]
+            return user
+
+        return Promise(self.get_user(follower["follower_id"])).then(add_follow_date)
@@ -1,48 +1,72 @@
 import asyncio
-import json
 import logging
-
-from aiohttp import FormData
+from collections import deque
 
 from gfypy.client.abstract_client import AbstractGfypy
+from gfypy.client.poller import UploadStatusPoller
 from gfypy.const import FILEDROP_ENDPOINT, GFYCAT_URL
 from gfypy.exceptions import GfypyAuthException, GfypyApiException
 from gfypy.gfy import Gfy
-from gfypy.http import AsyncHttpClient
-from gfypy.route import CustomRoute
-from gfypy.route import Route
+from gfypy.helpers import FeedCollector, aclosing
+from gfypy.http.async_http import AsyncHttpClient
+from gfypy.journal import BulkJournal
+from gfypy.result import BulkReport, BulkResult, DownloadResult, UploadResult
+from gfypy.route import CustomRoute, Route
 
 logger = logging.getLogger(__name__)
 
 
 class AsyncGfypy(AbstractGfypy):
-    def __init__(self, client_id, client_secret, auth_file_path, **kwargs):
-        super().__init__(client_id, client_secret, auth_file_path, **kwargs)
-        self._http = AsyncHttpClient(client_id, client_secret)
-
-    async def authenticate(self):
-        if not self._auth_file_path.is_file():
-            logging.info(
-                'Credentials file "%s" does not exist. Creating it now.',
-                self._auth_file_path,
-            )
-            with open(self._auth_file_path, "w") as auth_file:
-                auth_file.write(json.dumps(self._http.creds))
+    """
+    Further kwargs are passed to AsyncHttpClient. No rate_limits are set by default, so requests only slow down
+    when the API answers with a 429 or X-RateLimit headers; a limit for "api" also bounds concurrent calls like
+    upload_many, bulk operations and followers.
+    """
 
-        with open(self._auth_file_path, "r") as auth_file:
-            self._http.creds = json.loads(auth_file.read())
-
-            try:
-                await self._http.refresh_oauth_token(refresh=False)
-            except GfypyAuthException as e:
-                if e.code == "InvalidRefreshToken":
-                    await self._initial_auth()
-                    self._auth_to_disk()
-                else:
-                    raise
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        auth_file_path,
+        headless=False,
+        feed_cache=None,
+        **kwargs,
+    ):
+        super().__init__(
+            client_id,
+            client_secret,
+            auth_file_path,
+            headless=headless,
+            feed_cache=feed_cache,
+        )
+        self._http = AsyncHttpClient(client_id, client_secret, **kwargs)
+        self._poller = UploadStatusPoller(
+            self._check_upload_status, self.MAX_CHECK_TIME
+        )
+
+    async def authenticate(self, warm_up=0):
+        """
+        warm_up is the number of connections to open to each of the API and filedrop hosts right away, e.g.
+        the concurrency of a following upload_many, so that the first requests don't have to set them up.
+        """
+        if warm_up:
+            await self._http.warm_up([Route.BASE, FILEDROP_ENDPOINT], warm_up)
+
+        if self._auth_from_disk():
+            return
+
+        try:
+            await self._http.refresh_credentials()
+        except GfypyAuthException as e:
+            if e.code == "InvalidRefreshToken":
+                await self._initial_auth()
+            else:
+                raise
 
     async def close(self):
+        await self._poller.close()
         await self._http.close()
+        self._close_feed_cache()
 
     async def _initial_auth(self):
         await self._http.get_oauth_token(self._get_oauth_code())
@@ -56,73 +80,314 @@ class AsyncGfypy(AbstractGfypy):
         check_duplicate=False,
         check_upload=True,
     ):
-        tags = tags or []
+        with open(filename, "rb") as file:
+            key, sent = await self._send_upload(
+                file, None, title, tags, keep_audio, check_duplicate
+            )
 
+        return await self._finish_upload(key, filename, sent, check_upload)
+
+    async def upload_from_stream(
+        self,
+        stream,
+        title="",
+        tags=None,
+        keep_audio=True,
+        check_duplicate=False,
+        check_upload=True,
+        size=None,
+    ):
+        """
+        Uploads the rest of a binary file-like object or an async iterable of bytes, e.g. a download or the
+        stdout of another process, without buffering it. Files are read off the event loop.
+        If the stream can't seek, pass its size if it is known; otherwise the body is sent chunked and a failed
+        upload can't be retried. The stream isn't closed.
+        """
+        key, sent = await self._send_upload(
+            stream, size, title, tags, keep_audio, check_duplicate
+        )
+
+        return await self._finish_upload(
+            key, getattr(stream, "name", "The stream"), sent, check_upload
+        )
+
+    async def upload_from_bytes(
+        self,
+        data,
+        title="",
+        tags=None,
+        keep_audio=True,
+        check_duplicate=False,
+        check_upload=True,
+    ):
+        """
+        Uploads a clip that is already in memory as bytes, a bytearray or a memoryview, without copying it.
+        """
+        key, sent = await self._send_upload(
+            data, None, title, tags, keep_audio, check_duplicate
+        )
+
+        return await self._finish_upload(key, "The clip", sent, check_upload)
+
+    async def _send_upload(
+        self, source, size, title, tags, keep_audio, check_duplicate
+    ):
+        """
+        Sends source to the filedrop and returns its key and how many bytes have been sent.
+        """
         key = await self._get_key(title, tags, keep_audio, check_duplicate)
+        body = self._upload_body(key, source, size)
 
-        data = FormData()
-        data.add_field("key", key)
+        await self._http.request(
+            CustomRoute("POST", FILEDROP_ENDPOINT, family="filedrop"),
+            data=body,
+            headers={"content-type": body.content_type},
+            no_auth=True,
+        )
 
-        with open(filename, "rb") as file:
-            data.add_field("file", file, filename=filename)
+        return key, body.bytes_read
 
-            await self._http.request(
-                CustomRoute("POST", FILEDROP_ENDPOINT), data=data, no_auth=True
+    async def _finish_upload(self, key, name, size, check_upload):
+        if not check_upload:
+            logger.info(
+                "\n%s has been uploaded as %s/%s; checks have been skipped.",
+                name,
+                GFYCAT_URL,
+                key,
             )
+            return None
 
-        if check_upload:
-            status = await self._check_upload_status(key)
+        # the gfycat was likely uploaded correctly even if gfycat never sends 'task': 'complete'
+        await self._poller.wait(key, size)
 
-            num_checks = 0
-            while status["task"] != "complete":
-                if num_checks > self.MAX_CHECKS:
-                    # the gfycat was likely uploaded correctly, but gfycat is not sending 'task': 'complete'
-                    break
-                status = await self._check_upload_status(key)
-                num_checks += 1
-                await asyncio.sleep(3)
+        try:
+            gfy = await self.get_gfycat(key)
 
-            try:
-                gfy = await self.get_gfycat(key)
-
-                logger.info(
-                    "\n%s has been uploaded as %s/%s.", filename, GFYCAT_URL, key
-                )
-                return gfy
-            except GfypyApiException:
-                logger.info(
-                    "\n%s has probably been uploaded as %s/%s, but the check was unsuccessful.",
-                    filename,
-                    GFYCAT_URL,
-                    key,
-                )
-                return None
-        else:
+            logger.info("\n%s has been uploaded as %s/%s.", name, GFYCAT_URL, key)
+            return gfy
+        except GfypyApiException:
             logger.info(
-                "\n%s has been uploaded as %s/%s; checks have been skipped.",
-                filename,
+                "\n%s has probably been uploaded as %s/%s, but the check was unsuccessful.",
+                name,
                 GFYCAT_URL,
                 key,
             )
+            return None
+
+    async def upload_many(self, items, concurrency=4, **kwargs):
+        """
+        Uploads many files at once and yields an UploadResult for each of them as soon as it finishes.
+        Items are either filenames or dicts of upload_from_file arguments; kwargs apply to all items.
+        Errors are reported per item instead of aborting the whole batch.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(item):
+            async with semaphore:
+                try:
+                    return UploadResult(
+                        item,
+                        gfy=await self.upload_from_file(
+                            **self._upload_kwargs(item, kwargs)
+                        ),
+                    )
+                except Exception as e:
+                    logger.warning("Uploading %s failed: %s", item, e)
+                    return UploadResult(item, error=e)
+
+        tasks = [asyncio.ensure_future(upload(item)) for item in items]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def download_many(self, items, directory=".", policy=None, concurrency=4):
+        """
+        Downloads many gfys, given as Gfy objects or ids, at once and yields a DownloadResult for each of them
+        as soon as it finishes. Memory use is bounded by concurrency, since every file is streamed to disk.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def download(item):
+            async with semaphore:
+                try:
+                    return DownloadResult(
+                        item, path=await self.download(item, directory, policy)
+                    )
+                except Exception as e:
+                    logger.warning("Downloading %s failed: %s", item, e)
+                    return DownloadResult(item, error=e)
+
+        tasks = [asyncio.ensure_future(download(item)) for item in items]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_followers(self, fetch_userdata=False, concurrency=8):
+        if not fetch_userdata:
+            return await self._get_follower_list()
+
+        return [user async for user in self.followers_generator(concurrency)]
+
+    async def followers_generator(self, concurrency=8):
+        """
+        Yields the users following the account in the order of the follower list, while up to concurrency of
+        them are being fetched in the background.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def hydrate(follower):
+            async with semaphore:
+                return await self._hydrate_follower(follower)
+
+        pending = deque()
+
+        try:
+            for follower in await self._get_follower_list():
+                pending.append(asyncio.ensure_future(hydrate(follower)))
+
+                if len(pending) >= concurrency + self.FOLLOWERS_AHEAD:
+                    yield await pending.popleft()
+
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _bulk(self, operation, items, action, concurrency, journal):
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        report = BulkReport(operation)
+        journal = BulkJournal(journal, operation) if journal is not None else None
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(item, gfy):
+            async with semaphore:
+                try:
+                    await action(gfy)
+                except Exception as e:
+                    logger.warning("%s failed for %s: %s", operation, gfy.gfy_id, e)
+                    return BulkResult(item, error=e)
+
+            if journal is not None:
+                journal.record(gfy.gfy_id)
+            return BulkResult(item)
+
+        tasks = []
+        try:
+            for item, gfy in self._pending_bulk_items(report, items, journal):
+                tasks.append(asyncio.ensure_future(run(item, gfy)))
+
+            for next_done in asyncio.as_completed(tasks):
+                report.results.append(await next_done)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if journal is not None:
+                journal.close()
+
+        return report
+
+    async def _fetch_feed_page(self, route, per_request, cursor):
+        try:
+            return await self._http.request(
+                route, params={"count": per_request, "cursor": cursor}
+            )
+        except Exception:
+            logger.warning("Fetching the feed failed at cursor %r.", cursor)
+            raise
+
+    async def _prefetch_feed_pages(self, route, per_request, cursor, pages):
+        """
+        Requests each page as soon as its cursor is known and parses the previous one while it is in flight.
+        The bounded pages queue makes this wait for the consumer once it is prefetch pages ahead.
+        """
+        fetch = asyncio.ensure_future(self._fetch_feed_page(route, per_request, cursor))
+
+        try:
+            while True:
+                resp = await fetch
+
+                cursor = resp["cursor"]
+                if cursor:
+                    fetch = asyncio.ensure_future(
+                        self._fetch_feed_page(route, per_request, cursor)
+                    )
+
+                await pages.put(Gfy.from_dict_list(self._http, resp["gfycats"]))
+
+                if not cursor:
+                    logger.info("Got no new entries from Gfycat. Stopping here.")
+                    break
 
-    async def user_feed_generator(self, user_id=None, per_request=100):
+            await pages.put(None)
+        except Exception as e:
+            await pages.put(e)
+        finally:
+            fetch.cancel()
+
+    async def user_feed_generator(
+        self, user_id=None, per_request=100, cursor="", prefetch=0
+    ):
+        """
+        Pass the cursor logged by a failed crawl to resume it from the page it stopped at.
+        With prefetch > 0, up to that many pages are fetched ahead in the background while the current one
+        is being consumed. The background fetches only stop once the generator is closed, so a caller that may
+        stop early should close it explicitly:
+
+            async with aclosing(gfypy.user_feed_generator(prefetch=2)) as gfys:
+                async for gfy in gfys:
+                    ...
+        """
         if not 20 <= per_request <= 100:
             raise ValueError("Number per request needs to be between 20 and 100.")
 
-        cursor = ""
+        route = self._feed_route(user_id)
+
+        if prefetch > 0:
+            pages = asyncio.Queue(maxsize=prefetch)
+            producer = asyncio.ensure_future(
+                self._prefetch_feed_pages(route, per_request, cursor, pages)
+            )
 
-        if user_id is None:
-            route = Route("GET", "/me/gfycats")
-        else:
-            route = Route("GET", "/users/{id}/gfycats", id=user_id)
+            try:
+                while True:
+                    page = await pages.get()
+                    if page is None:
+                        break
+                    elif isinstance(page, Exception):
+                        raise page
+
+                    for new_gfy in page:
+                        yield new_gfy
+            finally:
+                producer.cancel()
+
+            return
 
         while True:
-            resp = await self._http.request(
-                route, params={"count": per_request, "cursor": cursor}
-            )
+            resp = await self._fetch_feed_page(route, per_request, cursor)
 
             cursor = resp["cursor"]
-            new_gfys = Gfy.from_dict_list(self, resp["gfycats"])
+            new_gfys = Gfy.from_dict_list(self._http, resp["gfycats"])
             for new_gfy in new_gfys:
                 yield new_gfy
 
@@ -130,26 +395,69 @@ class AsyncGfypy(AbstractGfypy):
                 logger.info("Got no new entries from Gfycat. Stopping here.")
                 break
 
+    async def sync_feed(self, user_id=None, full=None):
+        """
+        Brings the feed cache up to date. By default only new gfys are fetched, unless the last full sync is
+        older than the cache's refresh_interval. Returns the number of gfys that have been stored.
+        The cache is read and written on the default executor, so that SQLite doesn't block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        sync = await loop.run_in_executor(None, self._start_feed_sync, user_id, full)
+        route = self._feed_route(user_id)
+        cursor = ""
+
+        while True:
+            resp = await self._fetch_feed_page(route, 100, cursor)
+            cursor = resp["cursor"]
+
+            more = await loop.run_in_executor(None, sync.add_page, resp["gfycats"])
+            if not more or not cursor:
+                break
+
+        await loop.run_in_executor(None, sync.finish)
+        return sync.stored
+
     async def get_user_feed(
-        self, user_id=None, limit=100, sort_by=None, desc=True, filter_predicate=None
+        self,
+        user_id=None,
+        limit=100,
+        sort_by=None,
+        desc=True,
+        filter_predicate=None,
+        cursor="",
+        prefetch=0,
+        max_results=None,
+        use_cache=True,
     ):
+        """
+        Gfys are filtered while they stream in; with sort_by and max_results, only the top max_results are
+        kept, otherwise max_results stops the crawl as soon as enough gfys have been found.
+        With a feed cache, the cache is synced first and the query is answered from it, unless use_cache is
+        False or a cursor is given.
+        """
         if limit % 100 != 0 and limit >= 0:
             logger.warning("Limit needs to be divisible by 100. Rounding up.")
 
-        gfycats = []
+        collector = FeedCollector(sort_by, desc, filter_predicate, max_results)
 
-        async for gfy in self.user_feed_generator(user_id=user_id, per_request=100):
-            gfycats.append(gfy)
-
-            if len(gfycats) >= limit >= 0:
-                break
+        if self._use_feed_cache(use_cache, cursor):
+            await self.sync_feed(user_id)
+            gfys = await asyncio.get_running_loop().run_in_executor(
+                None, self._cached_feed, user_id
+            )
+            return self._collect_cached_feed(gfys, limit, collector)
 
-        if filter_predicate:
-            gfycats = [g for g in gfycats if filter_predicate(g)]
+        scanned = 0
 
-        if sort_by:
-            gfycats = sorted(
-                gfycats, key=lambda gfy: getattr(gfy, sort_by), reverse=desc
+        async with aclosing(
+            self.user_feed_generator(
+                user_id=user_id, per_request=100, cursor=cursor, prefetch=prefetch
             )
+        ) as gfys:
+            async for gfy in gfys:
+                scanned += 1
+
+                if not collector.add(gfy) or scanned >= limit >= 0:
+                    break
 
-        return gfycats
+        return collector.result()
@@ -0,0 +1,50 @@
+import random
+
+from gfypy.exceptions import GfypyException
+
+
+class StatusBackoff:
+    """
+    Computes the delays between upload status checks. The first delay grows with the file size since larger
+    files take longer to encode, subsequent delays back off exponentially and are jittered.
+    """
+
+    INITIAL_DELAY = 1.0
+    MAX_DELAY = 15.0
+    FACTOR = 1.5
+    # rough estimate of how fast Gfycat encodes an upload
+    ENCODED_BYTES_PER_SECOND = 4 * 1024 * 1024
+
+    FINAL_TASKS = ("complete", "error")
+
+    def __init__(self, file_size=None):
+        self._delay = min(
+            self.INITIAL_DELAY + (file_size or 0) / self.ENCODED_BYTES_PER_SECOND,
+            self.MAX_DELAY,
+        )
+
+    @classmethod
+    def is_final(cls, status):
+        """
+        Raises a GfypyException for a status that isn't a dict with a task, e.g. an error page that isn't JSON.
+        """
+        if not isinstance(status, dict) or "task" not in status:
+            raise GfypyException(f"Unexpected upload status: {status!r}")
+
+        return status["task"] in cls.FINAL_TASKS
+
+    def next(self, status):
+        if status["task"] == "NotFoundo":
+            # the upload has not been picked up yet, so it's too early to back off
+            delay = self.INITIAL_DELAY
+        else:
+            delay = self._delay
+            self._delay = min(self._delay * self.FACTOR, self.MAX_DELAY)
+
+            # while encoding, Gfycat sometimes estimates the remaining time
+            try:
+                delay = min(max(float(status["time"]), self.INITIAL_DELAY), delay)
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        return random.uniform(delay / 2, delay)
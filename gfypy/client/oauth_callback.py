@@ -0,0 +1,14 @@
+from http.server import SimpleHTTPRequestHandler
+from urllib.parse import urlparse
+
+
+class AuthCallbackRequestHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-type", "text/html")
+        self.end_headers()
+        self.wfile.write(bytes("<h2>You may close this window now!</h2>", "UTF-8"))
+        query = urlparse(self.path).query
+        query_components = dict(qc.split("=") for qc in query.split("&"))
+        code = query_components["code"]
+        self.server.code = code
@@ -0,0 +1,106 @@
+import asyncio
+
+from gfypy.client.backoff import StatusBackoff
+
+
+class _PendingUpload:
+    def __init__(self, future, file_size, due, deadline):
+        self.future = future
+        self.backoff = StatusBackoff(file_size)
+        self.due = due
+        self.deadline = deadline
+
+
+class UploadStatusPoller:
+    """
+    Polls the status of all outstanding uploads from a single background task and resolves a future with
+    the last status of each upload once it is final or max_check_time seconds have passed. A failed check
+    only fails the future of its own upload.
+    """
+
+    def __init__(self, check_status, max_check_time):
+        self._check_status = check_status
+        self._max_check_time = max_check_time
+        self._pending = {}
+        self._wakeup = None
+        self._task = None
+
+    def wait(self, key, file_size=None):
+        loop = asyncio.get_event_loop()
+
+        if key not in self._pending:
+            now = loop.time()
+            self._pending[key] = _PendingUpload(
+                loop.create_future(), file_size, now, now + self._max_check_time
+            )
+
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+        return self._pending[key].future
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+        for pending in self._pending.values():
+            pending.future.cancel()
+        self._pending.clear()
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+
+        try:
+            while self._pending:
+                now = loop.time()
+                due = [key for key, p in self._pending.items() if p.due <= now]
+
+                if due:
+                    statuses = await asyncio.gather(
+                        *(self._check_status(key) for key in due),
+                        return_exceptions=True,
+                    )
+                    self._update(due, statuses, loop.time())
+                    continue
+
+                self._wakeup.clear()
+                next_due = min(p.due for p in self._pending.values())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), next_due - now)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException as e:
+            # nobody would resolve the futures of the remaining uploads anymore, so they get the error instead
+            for pending in self._pending.values():
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            self._pending.clear()
+
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self._task = None
+
+    def _update(self, keys, statuses, now):
+        for key, status in zip(keys, statuses):
+            pending = self._pending.pop(key)
+            if pending.future.done():
+                continue
+
+            try:
+                if isinstance(status, BaseException):
+                    raise status
+
+                if StatusBackoff.is_final(status) or now >= pending.deadline:
+                    pending.future.set_result(status)
+                    continue
+
+                pending.due = min(now + pending.backoff.next(status), pending.deadline)
+            except BaseException as e:
+                pending.future.set_exception(e)
+                continue
+
+            self._pending[key] = pending
@@ -1,47 +1,81 @@
-import json
+import itertools
 import logging
 import time
-
-from tqdm import tqdm
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from gfypy.client.abstract_client import AbstractGfypy
+from gfypy.client.backoff import StatusBackoff
 from gfypy.const import GFYCAT_URL, FILEDROP_ENDPOINT
 from gfypy.exceptions import GfypyAuthException, GfypyApiException
 from gfypy.gfy import Gfy
-from gfypy.http import SyncHttpClient
-from gfypy.route import Route, CustomRoute
+from gfypy.helpers import FeedCollector
+from gfypy.http.sync_http import SyncHttpClient
+from gfypy.http.pool import PoolConfig
+from gfypy.journal import BulkJournal
+from gfypy.result import BulkReport, BulkResult, DownloadResult, UploadResult
+from gfypy.route import CustomRoute, Route
 
 logger = logging.getLogger(__name__)
 
 
 class Gfypy(AbstractGfypy):
-    def __init__(self, client_id, client_secret, auth_file_path, **kwargs):
-        super().__init__(client_id, client_secret, auth_file_path, **kwargs)
-        self._http = SyncHttpClient(client_id, client_secret)
-
-    def authenticate(self):
-        if not self._auth_file_path.is_file():
-            logger.info(
-                'Credentials file "%s" does not exist. Creating it now.',
-                self._auth_file_path,
-            )
-            with open(self._auth_file_path, "w") as auth_file:
-                auth_file.write(json.dumps(self._http.creds))
+    """
+    Further kwargs are passed to SyncHttpClient. No rate_limits are set by default, so requests only slow down
+    when the API answers with a 429 or X-RateLimit headers; a limit for "api" also bounds get_gfycats, bulk
+    operations and other parallel calls.
+    """
 
-        with open(self._auth_file_path, "r") as auth_file:
-            self._http.creds = json.loads(auth_file.read())
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        auth_file_path,
+        headless=False,
+        feed_cache=None,
+        max_workers=8,
+        **kwargs,
+    ):
+        super().__init__(
+            client_id,
+            client_secret,
+            auth_file_path,
+            headless=headless,
+            feed_cache=feed_cache,
+        )
+        pool = kwargs.get("pool") or PoolConfig()
+        if pool.size is None:
+            # every worker gets its own pooled connection
+            kwargs["pool"] = pool.replace(size=max_workers)
+        self._http = SyncHttpClient(client_id, client_secret, **kwargs)
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="gfypy"
+        )
 
-            try:
-                self._http.refresh_oauth_token(refresh=False)
-            except GfypyAuthException as e:
-                if e.code == "InvalidRefreshToken":
-                    self._initial_auth()
-                    self._auth_to_disk()
-                else:
-                    raise
+    def authenticate(self, warm_up=0):
+        """
+        warm_up is the number of connections to open to each of the API and filedrop hosts right away, e.g.
+        max_workers before a parallel upload, so that the first requests don't have to set them up.
+        """
+        if warm_up:
+            self._http.warm_up([Route.BASE, FILEDROP_ENDPOINT], warm_up)
+
+        if self._auth_from_disk():
+            return
+
+        try:
+            self._http.refresh_credentials()
+        except GfypyAuthException as e:
+            if e.code == "InvalidRefreshToken":
+                self._initial_auth()
+            else:
+                raise
 
     def close(self):
+        self._executor.shutdown()
         self._http.close()
+        self._close_feed_cache()
 
     def _initial_auth(self):
         self._http.get_oauth_token(self._get_oauth_code())
@@ -54,114 +88,322 @@ class Gfypy(AbstractGfypy):
         keep_audio=True,
         check_duplicate=False,
         check_upload=True,
+        progress_callback=None,
     ):
-        tags = tags or []
+        """
+        The file is streamed from disk, so memory usage stays flat regardless of its size.
+        progress_callback is called with the number of bytes sent so far and the total body size.
+        """
+        with open(filename, "rb") as file:
+            key, sent = self._send_upload(
+                file, None, title, tags, keep_audio, check_duplicate, progress_callback
+            )
 
-        key = self._get_key(title, tags, keep_audio, check_duplicate)
-        payload = {"key": key}
+        return self._finish_upload(key, filename, sent, check_upload)
 
-        with open(filename, "rb") as file:
-            files = {"file": (key, file.read())}
+    def upload_from_stream(
+        self,
+        stream,
+        title="",
+        tags=None,
+        keep_audio=True,
+        check_duplicate=False,
+        check_upload=True,
+        progress_callback=None,
+        size=None,
+    ):
+        """
+        Uploads the rest of a binary file-like object, e.g. the stdout of another process, without buffering it.
+        If the stream can't seek, pass its size if it is known; otherwise the body is sent chunked, the total
+        passed to progress_callback is None and a failed upload can't be retried. The stream isn't closed.
+        """
+        key, sent = self._send_upload(
+            stream, size, title, tags, keep_audio, check_duplicate, progress_callback
+        )
 
-        self._http.request(
-            CustomRoute("POST", FILEDROP_ENDPOINT),
-            data=payload,
-            files=files,
-            no_auth=True,
+        return self._finish_upload(
+            key, getattr(stream, "name", "The stream"), sent, check_upload
         )
 
-        if check_upload:
-            status = self._check_upload_status(key)
+    def upload_from_bytes(
+        self,
+        data,
+        title="",
+        tags=None,
+        keep_audio=True,
+        check_duplicate=False,
+        check_upload=True,
+        progress_callback=None,
+    ):
+        """
+        Uploads a clip that is already in memory as bytes, a bytearray or a memoryview, without copying it.
+        """
+        key, sent = self._send_upload(
+            data, None, title, tags, keep_audio, check_duplicate, progress_callback
+        )
 
-            progress = tqdm(total=self.MAX_CHECKS)
-            num_checks = 0
-            while status["task"] != "complete":
-                if num_checks > self.MAX_CHECKS:
-                    # the gfycat was likely uploaded correctly, but gfycat is not sending 'task': 'complete'
-                    break
-                status = self._check_upload_status(key)
-                progress.update(1)
-                num_checks += 1
-                time.sleep(3)
+        return self._finish_upload(key, "The clip", sent, check_upload)
 
-            progress.close()
+    def _send_upload(
+        self, source, size, title, tags, keep_audio, check_duplicate, progress_callback
+    ):
+        """
+        Sends source to the filedrop and returns its key and how many bytes have been sent.
+        """
+        key = self._get_key(title, tags, keep_audio, check_duplicate)
+        body = self._upload_body(key, source, size, progress_callback)
 
-            try:
-                gfy = self.get_gfycat(key)
+        self._http.request(
+            CustomRoute("POST", FILEDROP_ENDPOINT, family="filedrop"),
+            data=body,
+            headers={"content-type": body.content_type},
+            no_auth=True,
+        )
 
-                logger.info(
-                    "\n%s has been uploaded as %s/%s.", filename, GFYCAT_URL, key
-                )
-                return gfy
-            except GfypyApiException:
-                logger.info(
-                    "\n%s has probably been uploaded as %s/%s, but the check was unsuccessful.",
-                    filename,
-                    GFYCAT_URL,
-                    key,
-                )
-                return None
-        else:
+        return key, body.bytes_read
+
+    def _finish_upload(self, key, name, size, check_upload):
+        if not check_upload:
             logger.info(
                 "\n%s has been uploaded as %s/%s; checks have been skipped.",
-                filename,
+                name,
                 GFYCAT_URL,
                 key,
             )
+            return None
+
+        backoff = StatusBackoff(size)
+        started = time.monotonic()
+        deadline = started + self.MAX_CHECK_TIME
+        status = self._check_upload_status(key)
 
-    def get_followers(self, fetch_userdata=False):
-        resp = self._http.request(Route("GET", "/me/followers"))
+        from tqdm import tqdm
 
+        progress = tqdm(total=self.MAX_CHECK_TIME, unit="s")
+        while not StatusBackoff.is_final(status):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # the gfycat was likely uploaded correctly, but gfycat is not sending 'task': 'complete'
+                break
+            time.sleep(min(backoff.next(status), remaining))
+            status = self._check_upload_status(key)
+            progress.update(int(time.monotonic() - started) - progress.n)
+
+        progress.close()
+
+        try:
+            gfy = self.get_gfycat(key)
+
+            logger.info("\n%s has been uploaded as %s/%s.", name, GFYCAT_URL, key)
+            return gfy
+        except GfypyApiException:
+            logger.info(
+                "\n%s has probably been uploaded as %s/%s, but the check was unsuccessful.",
+                name,
+                GFYCAT_URL,
+                key,
+            )
+            return None
+
+    def get_followers(self, fetch_userdata=False, concurrency=8):
         if not fetch_userdata:
-            return resp["followers"]
-        else:
-            users = []
-            for follower in resp["followers"]:
-                user = self.get_user(follower["follower_id"])
-                user["follow_date"] = follower["follow_date"]
-                users.append(user)
+            return self._get_follower_list()
+
+        return list(self.followers_generator(concurrency))
+
+    def followers_generator(self, concurrency=8):
+        """
+        Yields the users following the account in the order of the follower list, while up to concurrency of
+        them are being fetched on the worker pool. The next follower is only submitted once one has been yielded.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        pending = deque()
+
+        try:
+            for follower in self._get_follower_list():
+                if len(pending) >= concurrency:
+                    yield pending.popleft().result()
+
+                pending.append(self._executor.submit(self._hydrate_follower, follower))
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _run_bounded(self, func, items, concurrency):
+        """
+        Runs func for every item on the worker pool, with at most concurrency of them submitted at a time,
+        and yields the results as they finish.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency needs to be at least 1.")
+
+        items = iter(items)
+        pending = set()
+
+        try:
+            while True:
+                for item in itertools.islice(items, concurrency - len(pending)):
+                    pending.add(self._executor.submit(func, item))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def upload_many(self, items, concurrency=4, **kwargs):
+        """
+        Uploads many files at once and yields an UploadResult for each of them as soon as it finishes.
+        Items are either filenames or dicts of upload_from_file arguments; kwargs apply to all items.
+        Errors are reported per item instead of aborting the whole batch.
+        """
+
+        def upload(item):
+            try:
+                return UploadResult(
+                    item, gfy=self.upload_from_file(**self._upload_kwargs(item, kwargs))
+                )
+            except Exception as e:
+                logger.warning("Uploading %s failed: %s", item, e)
+                return UploadResult(item, error=e)
+
+        return self._run_bounded(upload, items, concurrency)
+
+    def download_many(self, items, directory=".", policy=None, concurrency=4):
+        """
+        Downloads many gfys, given as Gfy objects or ids, at once and yields a DownloadResult for each of them
+        as soon as it finishes. Memory use is bounded by concurrency, since every file is streamed to disk.
+        """
+
+        def download(item):
+            try:
+                return DownloadResult(item, path=self.download(item, directory, policy))
+            except Exception as e:
+                logger.warning("Downloading %s failed: %s", item, e)
+                return DownloadResult(item, error=e)
+
+        return self._run_bounded(download, items, concurrency)
+
+    def get_gfycats(self, ids):
+        """
+        Fetches several gfycats in parallel and returns them in the order of ids.
+        """
+        return list(self._executor.map(self.get_gfycat, ids))
 
-            return users
+    def _bulk(self, operation, items, action, concurrency, journal):
+        report = BulkReport(operation)
+        journal = BulkJournal(journal, operation) if journal is not None else None
+
+        def run(pending_item):
+            item, gfy = pending_item
+
+            try:
+                action(gfy)
+            except Exception as e:
+                logger.warning("%s failed for %s: %s", operation, gfy.gfy_id, e)
+                return BulkResult(item, error=e)
+
+            if journal is not None:
+                journal.record(gfy.gfy_id)
+            return BulkResult(item)
+
+        try:
+            pending = self._pending_bulk_items(report, items, journal)
+            report.results.extend(self._run_bounded(run, pending, concurrency))
+        finally:
+            if journal is not None:
+                journal.close()
+
+        return report
+
+    def _fetch_feed_page(self, route, per_request, cursor):
+        try:
+            return self._http.request(
+                route, params={"count": per_request, "cursor": cursor}
+            )
+        except Exception:
+            logger.warning("Fetching the feed failed at cursor %r.", cursor)
+            raise
+
+    def sync_feed(self, user_id=None, full=None):
+        """
+        Brings the feed cache up to date. By default only new gfys are fetched, unless the last full sync is
+        older than the cache's refresh_interval. Returns the number of gfys that have been stored.
+        """
+        sync = self._start_feed_sync(user_id, full)
+        route = self._feed_route(user_id)
+        cursor = ""
+
+        while True:
+            resp = self._fetch_feed_page(route, 100, cursor)
+            cursor = resp["cursor"]
+
+            if not sync.add_page(resp["gfycats"]) or not cursor:
+                break
+
+        sync.finish()
+        return sync.stored
 
     def get_user_feed(
-        self, user_id=None, limit=100, sort_by=None, desc=True, filter_predicate=None
+        self,
+        user_id=None,
+        limit=100,
+        sort_by=None,
+        desc=True,
+        filter_predicate=None,
+        cursor="",
+        max_results=None,
+        use_cache=True,
     ):
+        """
+        Gfys are filtered while they stream in; with sort_by and max_results, only the top max_results are
+        kept, otherwise max_results stops the crawl as soon as enough gfys have been found.
+        With a feed cache, the cache is synced first and the query is answered from it, unless use_cache is
+        False or a cursor is given.
+        Pass the cursor logged by a failed crawl to resume it from the page it stopped at.
+        """
         if limit % 100 != 0 and limit >= 0:
             print("Limit needs to be divisible by 100. Rounding up.")
 
-        gfycats = []
-        i = 0
-        cursor = ""
+        collector = FeedCollector(sort_by, desc, filter_predicate, max_results)
+
+        if self._use_feed_cache(use_cache, cursor):
+            self.sync_feed(user_id)
+            return self._collect_cached_feed(
+                self._cached_feed(user_id), limit, collector
+            )
 
-        if user_id is None:
-            route = Route("GET", "/me/gfycats")
-        else:
-            route = Route("GET", "/users/{id}/gfycats", id=user_id)
+        route = self._feed_route(user_id)
+        scanned = 0
+
+        from tqdm import tqdm
 
         progress = tqdm(total=limit)
 
-        while i < limit or limit < 0:
-            resp = self._http.request(route, params={"count": 100, "cursor": cursor})
+        while scanned < limit or limit < 0:
+            resp = self._fetch_feed_page(route, 100, cursor)
 
             cursor = resp["cursor"]
-            new_gfys = Gfy.from_dict_list(self, resp["gfycats"])
-            gfycats.extend(new_gfys)
+            new_gfys = Gfy.from_dict_list(self._http, resp["gfycats"])
+            scanned += len(new_gfys)
             progress.update(len(new_gfys))
 
+            if not all(collector.add(gfy) for gfy in new_gfys):
+                break
+
             if not cursor:
                 print("Got no new entries from Gfycat. Stopping here.")
                 break
 
-            i = len(gfycats)
-
         progress.close()
 
-        if filter_predicate:
-            gfycats = [g for g in gfycats if filter_predicate(g)]
-
-        if sort_by:
-            gfycats = sorted(
-                gfycats, key=lambda gfy: getattr(gfy, sort_by), reverse=desc
-            )
-
-        return gfycats
+        return collector.result()
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class CredentialStore:
+    """
+    Persists the OAuth credentials of one account so that they can be shared by several processes.
+    Writes replace the file atomically, and refreshes are serialized through an exclusive lock on a
+    separate lock file, so only one process rotates the tokens while the others pick up the result.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        self._lock_file = None
+
+    def load(self):
+        try:
+            with open(self.path, "r") as creds_file:
+                return json.loads(creds_file.read())
+        except FileNotFoundError:
+            return None
+
+    def save(self, creds):
+        fd, tmp_path = tempfile.mkstemp(
+            dir=str(self.path.parent), prefix=self.path.name, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(json.dumps(creds))
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+            os.replace(tmp_path, str(self.path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def acquire(self):
+        """
+        Blocks until this thread holds the lock across all processes sharing the store.
+        """
+        self._thread_lock.acquire()
+        try:
+            self._lock_file = open(self._lock_path, "a+")
+
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after 10 seconds
+                        time.sleep(0.1)
+        except BaseException:
+            self._close_lock_file()
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._close_lock_file()
+            self._thread_lock.release()
+
+    def _close_lock_file(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    @contextmanager
+    def lock(self):
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
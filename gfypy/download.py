@@ -0,0 +1,252 @@
+import hashlib
+import os
+import typing
+from dataclasses import dataclass
+
+from gfypy.exceptions import GfypyApiException, GfypyException
+from gfypy.gfy import ContentUrl
+
+# ContentUrls attribute -> file extension
+EXTENSIONS = {
+    "mp4": ".mp4",
+    "webm": ".webm",
+    "mobile": ".mp4",
+    "webp": ".webp",
+    "large_gif": ".gif",
+    "max5_mb_gif": ".gif",
+    "max2_mb_gif": ".gif",
+    "max1_mb_gif": ".gif",
+    "_100_px_gif": ".gif",
+    "mobile_poster": ".jpg",
+}
+CHUNK_SIZE = 256 * 1024
+
+
+def _int(value):
+    # the API sometimes returns sizes as str
+    return int(value) if value is not None else None
+
+
+@dataclass
+class Rendition:
+    name: str
+    url: str
+    size: typing.Optional[int] = None
+    width: typing.Optional[int] = None
+    height: typing.Optional[int] = None
+    md5: typing.Optional[str] = None
+
+    @property
+    def extension(self):
+        return EXTENSIONS[self.name]
+
+
+class RenditionPolicy:
+    """
+    Chooses the rendition of a gfy to download: the smallest one of formats that is at least min_width by
+    min_height pixels and at most max_size bytes. formats are ContentUrls attributes; among renditions of the
+    same size, the one listed first wins. A rendition of unknown size is only chosen if no other one is
+    acceptable. With verify_md5, an mp4 rendition is checked against the md5 the API reports for the gfy,
+    assuming it is that of the mp4, and deleted if it doesn't match.
+    """
+
+    def __init__(
+        self,
+        formats=("mp4", "webm"),
+        min_width=None,
+        min_height=None,
+        max_size=None,
+        verify_md5=False,
+    ):
+        unknown = set(formats) - set(EXTENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown formats: {', '.join(sorted(unknown))}.")
+
+        self.formats = tuple(formats)
+        self.min_width = min_width
+        self.min_height = min_height
+        self.max_size = max_size
+        self.verify_md5 = verify_md5
+
+    @staticmethod
+    def _content_url(gfy, name):
+        content_url = getattr(gfy.content_urls, name, None)
+
+        # older payloads only have the top-level urls
+        if content_url is None and name in ("mp4", "webm"):
+            content_url = ContentUrl(
+                url=gfy.get(f"{name}Url"),
+                size=gfy.get(f"{name}Size"),
+                width=gfy.width,
+                height=gfy.height,
+            )
+
+        return content_url
+
+    def _acceptable(self, rendition):
+        if self.min_width is not None and (rendition.width or 0) < self.min_width:
+            return False
+        if self.min_height is not None and (rendition.height or 0) < self.min_height:
+            return False
+
+        return (
+            self.max_size is None
+            or rendition.size is None
+            or rendition.size <= self.max_size
+        )
+
+    def choose(self, gfy):
+        """
+        Returns the Rendition to download, or None if no rendition of the gfy is acceptable.
+        """
+        candidates = []
+
+        for preference, name in enumerate(self.formats):
+            content_url = self._content_url(gfy, name)
+            if content_url is None or not content_url.url:
+                continue
+
+            rendition = Rendition(
+                name,
+                content_url.url,
+                _int(content_url.size),
+                _int(content_url.width),
+                _int(content_url.height),
+                gfy.md5 if self.verify_md5 and name == "mp4" else None,
+            )
+            if self._acceptable(rendition):
+                candidates.append(
+                    (rendition.size is None, rendition.size or 0, preference, rendition)
+                )
+
+        if not candidates:
+            return None
+
+        return min(candidates, key=lambda candidate: candidate[:3])[-1]
+
+
+def _range_start(headers):
+    # Content-Range: bytes <start>-<end>/<size>
+    unit, _, byte_range = headers.get("content-range", "").partition(" ")
+    start = byte_range.partition("-")[0]
+
+    return int(start) if unit == "bytes" and start.isdigit() else None
+
+
+class PartialDownload:
+    """
+    Writes a download to a .part file next to path and moves it into place once it is complete and has the
+    expected size and md5. A .part file that an interrupted download left behind is resumed from its end.
+    """
+
+    def __init__(self, path, size=None, md5=None):
+        self.path = os.fspath(path)
+        self.part_path = self.path + ".part"
+        self.size = size
+        self.md5 = md5
+        # bytes received by this instance, as opposed to offset, which includes earlier runs
+        self.received = 0
+        self._file = None
+        self._hash = None
+
+        try:
+            self.offset = os.path.getsize(self.part_path)
+        except OSError:
+            self.offset = 0
+
+        if size is not None and self.offset > size:
+            self.offset = 0
+
+    @property
+    def complete(self):
+        """
+        Whether path has been downloaded already.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+
+        return self.size is None or size == self.size
+
+    @property
+    def incomplete(self):
+        """
+        Whether the transfer ended before the expected size was received.
+        """
+        return self.size is not None and self.offset < self.size
+
+    def request_headers(self):
+        # compressed responses can't be resumed byte for byte
+        headers = {"accept-encoding": "identity"}
+        if self.offset:
+            headers["range"] = f"bytes={self.offset}-"
+
+        return headers
+
+    def start(self, status, headers):
+        """
+        Opens the .part file for the response to a request with request_headers(). Returns False if there is
+        nothing left to receive.
+        """
+        if status == 206 and self.offset and _range_start(headers) == self.offset:
+            mode = "ab"
+        elif status == 200:
+            # the server ignored the range, so the download starts over
+            self.offset = 0
+            mode = "wb"
+        elif status == 416 and self.offset:
+            # the .part file is complete already; finish() verifies it
+            return False
+        else:
+            raise GfypyApiException(f"Downloading {self.path} failed.", status)
+
+        if self.md5 is not None:
+            self._hash = hashlib.md5()
+            if mode == "ab":
+                self._hash_part_file()
+
+        self._file = open(self.part_path, mode)
+        return True
+
+    def _hash_part_file(self):
+        with open(self.part_path, "rb") as part_file:
+            for chunk in iter(lambda: part_file.read(CHUNK_SIZE), b""):
+                self._hash.update(chunk)
+
+    def write(self, chunk):
+        self._file.write(chunk)
+        self.offset += len(chunk)
+        self.received += len(chunk)
+
+        if self._hash is not None:
+            self._hash.update(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """
+        Verifies the .part file and moves it to path, which is returned. A file that doesn't match is deleted.
+        """
+        self.close()
+
+        error = None
+        if self.size is not None and self.offset != self.size:
+            error = f"{self.path} has {self.offset} bytes instead of {self.size}."
+        elif self.md5 is not None:
+            if self._hash is None:
+                self._hash = hashlib.md5()
+                self._hash_part_file()
+
+            if self._hash.hexdigest() != self.md5.lower():
+                error = f"The md5 of {self.path} doesn't match."
+
+        if error is not None:
+            os.remove(self.part_path)
+            raise GfypyException(error)
+
+        os.replace(self.part_path, self.path)
+        return self.path
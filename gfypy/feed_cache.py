@@ -0,0 +1,164 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .gfy import Gfy
+
+
+class FeedSync:
+    """
+    One pass over a feed, newest page first. An incremental sync stops at the first page that contains
+    gfys the cache already knows; a full sync visits every page, which refreshes mutable fields like views
+    or gatekeeper and removes gfys that have been deleted since.
+    """
+
+    def __init__(self, cache, feed, full):
+        self._cache = cache
+        self._feed = feed
+        self.full = full
+        self.started = time.time()
+        self.stored = 0
+
+    def add_page(self, payloads):
+        """
+        Stores a page of raw gfy payloads. Returns whether the next page is needed.
+        """
+        if self.full:
+            self.stored += self._cache._store(self._feed, payloads, self.started)
+            return True
+
+        known = self._cache._known_ids(self._feed, [p["gfyId"] for p in payloads])
+        self.stored += self._cache._store(
+            self._feed,
+            [p for p in payloads if p["gfyId"] not in known],
+            self.started,
+        )
+        return not known
+
+    def finish(self):
+        """
+        Must only be called once the sync has visited every page it needed.
+        """
+        if self.full:
+            self._cache._finish_full_sync(self._feed, self.started)
+
+
+class FeedCache:
+    """
+    Persists feeds in SQLite, keyed by gfyId, so that feed queries can be answered locally and only the
+    changes since the last sync have to be fetched. Full syncs are done every refresh_interval seconds; until
+    then, mutable fields like views or gatekeeper of cached gfys aren't updated. Feed queries sync the cache
+    first, so the first one crawls the whole feed, however small its limit.
+    """
+
+    def __init__(self, path, refresh_interval=24 * 60 * 60):
+        self.path = Path(path)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS gfys ("
+                "feed TEXT NOT NULL, gfy_id TEXT NOT NULL, create_date INTEGER, "
+                "payload TEXT NOT NULL, synced_at REAL NOT NULL, "
+                "PRIMARY KEY (feed, gfy_id))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS gfys_by_date ON gfys (feed, create_date)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS feeds ("
+                "feed TEXT PRIMARY KEY, full_sync_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def feed_key(user_id):
+        return "" if user_id is None else f"users/{user_id}"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def sync(self, user_id=None, full=None):
+        """
+        Starts a sync of the given feed. By default it is a full sync if the last one is older than
+        refresh_interval, otherwise an incremental one.
+        """
+        feed = self.feed_key(user_id)
+
+        if full is None:
+            full_sync_at = self.last_full_sync(user_id)
+            full = (
+                full_sync_at is None
+                or time.time() - full_sync_at >= self.refresh_interval
+            )
+
+        return FeedSync(self, feed, full)
+
+    def last_full_sync(self, user_id=None):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT full_sync_at FROM feeds WHERE feed = ?",
+                (self.feed_key(user_id),),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def gfys(self, http, user_id=None):
+        """
+        Returns the cached feed, newest first.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM gfys WHERE feed = ? "
+                "ORDER BY create_date DESC, gfy_id",
+                (self.feed_key(user_id),),
+            ).fetchall()
+
+        return [Gfy.from_dict(http, json.loads(payload)) for payload, in rows]
+
+    def _known_ids(self, feed, gfy_ids):
+        if not gfy_ids:
+            return set()
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT gfy_id FROM gfys WHERE feed = ? "
+                f"AND gfy_id IN ({', '.join('?' * len(gfy_ids))})",
+                (feed, *gfy_ids),
+            ).fetchall()
+
+        return {gfy_id for gfy_id, in rows}
+
+    def _store(self, feed, payloads, synced_at):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO gfys "
+                "(feed, gfy_id, create_date, payload, synced_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        feed,
+                        payload["gfyId"],
+                        payload.get("createDate"),
+                        json.dumps(payload),
+                        synced_at,
+                    )
+                    for payload in payloads
+                ],
+            )
+
+        return len(payloads)
+
+    def _finish_full_sync(self, feed, started):
+        with self._lock, self._db:
+            # whatever the full sync didn't see anymore has been deleted
+            self._db.execute(
+                "DELETE FROM gfys WHERE feed = ? AND synced_at < ?", (feed, started)
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO feeds (feed, full_sync_at) VALUES (?, ?)",
+                (feed, started),
+            )
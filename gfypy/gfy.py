@@ -1,4 +1,3 @@
-import json
 from datetime import datetime
 
 from .route import Route
@@ -60,94 +59,164 @@ class ContentUrls:
         self.mobile = ContentUrl(**kwargs.pop("mobile")) if "mobile" in kwargs else None
 
 
-@dataclass
+def _int(value):
+    # explicit cast to int required because the API sometimes returns a str
+    return int(value) if value is not None else 0
+
+
+def _list(value):
+    return value if value is not None else []
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value) if value is not None else None
+
+
+class _Field:
+    """
+    Reads an attribute from the raw payload when it is accessed. Converted values are parsed once and
+    cached; assigned values shadow the payload without modifying it.
+    """
+
+    def __init__(self, key, convert=None):
+        self.key = key
+        self.convert = convert
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, gfy, owner=None):
+        if gfy is None:
+            return self
+
+        parsed = gfy._parsed
+        if parsed is not None and self.name in parsed:
+            return parsed[self.name]
+
+        value = gfy.get(self.key)
+        if self.convert is None:
+            return value
+
+        value = self.convert(value)
+        if parsed is None:
+            parsed = gfy._parsed = {}
+        parsed[self.name] = value
+        return value
+
+    def __set__(self, gfy, value):
+        if gfy._parsed is None:
+            gfy._parsed = {}
+        gfy._parsed[self.name] = value
+
+
 class Gfy(dict):
+    """
+    A gfycat as returned by the API. The raw payload is the dict itself; attributes are parsed from it
+    lazily when they are first accessed.
+    """
+
+    __slots__ = ("_http", "_parsed")
+
+    content_urls: ContentUrls = _Field(
+        "content_urls", lambda value: ContentUrls(**(value or {}))
+    )
+    user_data: UserData = _Field("userData", lambda value: UserData(**(value or {})))
+
+    likes: int = _Field("likes", _int)
+    dislikes: int = _Field("dislikes", _int)
+    gfy_number: int = _Field("gfyNumber", _int)
+
+    title: str = _Field("title")
+    tags: typing.Set[str] = _Field("tags", lambda value: set(value or ()))
+    language_categories: typing.List[typing.Any] = _Field("languageCategories", _list)
+    domain_whitelist: typing.List[typing.Any] = _Field("domainWhitelist", _list)
+    geo_whitelist: typing.List[typing.Any] = _Field("geoWhitelist", _list)
+    published: int = _Field("published")
+    nsfw: int = _Field("nsfw")
+    gatekeeper: int = _Field("gatekeeper")
+    mp4_url: str = _Field("mp4Url")
+    gif_url: str = _Field("gifUrl")
+    webm_url: str = _Field("webmUrl")
+    webp_url: str = _Field("webpUrl")
+    mobile_url: str = _Field("mobileUrl")
+    mobile_poster_url: str = _Field("mobilePosterUrl")
+    extra_lemmas: str = _Field("extraLemmas")
+    thumb100_poster_url: str = _Field("thumb100PosterUrl")
+    mini_url: str = _Field("miniUrl")
+    gif100_px: str = _Field("gif100px")
+    mini_poster_url: str = _Field("miniPosterUrl")
+    max5_mb_gif: str = _Field("max5mbGif")
+    max2_mb_gif: str = _Field("max2mbGif")
+    max1_mb_gif: str = _Field("max1mbGif")
+    poster_url: str = _Field("posterUrl")
+    language_text: str = _Field("languageText")
+    views: int = _Field("views")
+    user_name: str = _Field("userName")
+    description: str = _Field("description")
+    sitename: str = _Field("sitename")
+    has_transparency: bool = _Field("hasTransparency")
+    has_audio: bool = _Field("hasAudio")
+    gfy_id: str = _Field("gfyId")
+    gfy_name: str = _Field("gfyName")
+    width: int = _Field("width")
+    height: int = _Field("height")
+    frame_rate: float = _Field("frameRate")
+    num_frames: int = _Field("numFrames")
+    mp4_size: int = _Field("mp4Size")
+    webm_size: int = _Field("webmSize")
+    create_date: datetime = _Field("createDate", _timestamp)
+    source: int = _Field("source")
+    gfy_slug: str = _Field("gfySlug")
+    md5: str = _Field("md5")
+    rating: typing.Any = _Field("rating")
+    avg_color: str = _Field("avgColor")
+    user_display_name: str = _Field("userDisplayName")
+    user_profile_image_url: str = _Field("userProfileImageUrl")
+
     def __init__(self, http, **kwargs):
         super().__init__(kwargs)
         self._http = http
-        self._source = kwargs
-
-        self.content_urls = ContentUrls(**kwargs.pop("content_urls", {}))
-        self.user_data = UserData(**kwargs.pop("userData", {}))
-
-        # explicit cast to int required because the API sometimes returns a str
-        self.likes: int = int(kwargs.pop("likes", 0))
-        self.dislikes: int = int(kwargs.pop("dislikes", 0))
-        self.gfy_number: int = int(kwargs.pop("gfyNumber", 0))
-
-        self.title = kwargs.pop("title", None)
-        self.tags: typing.Set[str] = set(kwargs.pop("tags", None))
-        self.language_categories: typing.List[typing.Any] = kwargs.pop(
-            "languageCategories", []
-        )
-        self.domain_whitelist: typing.List[typing.Any] = kwargs.pop(
-            "domainWhitelist", []
-        )
-        self.geo_whitelist: typing.List[typing.Any] = kwargs.pop("geoWhitelist", [])
-        self.published: int = kwargs.pop("published", None)
-        self.nsfw: int = kwargs.pop("nsfw", None)
-        self.gatekeeper: int = kwargs.pop("gatekeeper", None)
-        self.mp4_url: str = kwargs.pop("mp4Url", None)
-        self.gif_url: str = kwargs.pop("gifUrl", None)
-        self.webm_url: str = kwargs.pop("webmUrl", None)
-        self.webp_url: str = kwargs.pop("webpUrl", None)
-        self.mobile_url: str = kwargs.pop("mobileUrl", None)
-        self.mobile_poster_url: str = kwargs.pop("mobilePosterUrl", None)
-        self.extra_lemmas: str = kwargs.pop("extraLemmas", None)
-        self.thumb100_poster_url: str = kwargs.pop("thumb100PosterUrl", None)
-        self.mini_url: str = kwargs.pop("miniUrl", None)
-        self.gif100_px: str = kwargs.pop("gif100px", None)
-        self.mini_poster_url: str = kwargs.pop("miniPosterUrl", None)
-        self.max5_mb_gif: str = kwargs.pop("max5mbGif", None)
-        self.max2_mb_gif: str = kwargs.pop("max2mbGif", None)
-        self.max1_mb_gif: str = kwargs.pop("max1mbGif", None)
-        self.poster_url: str = kwargs.pop("posterUrl", None)
-        self.language_text: str = kwargs.pop("languageText", None)
-        self.views: int = kwargs.pop("views", None)
-        self.user_name: str = kwargs.pop("userName", None)
-        self.description: str = kwargs.pop("description", None)
-        self.sitename: str = kwargs.pop("sitename", None)
-        self.has_transparency: bool = kwargs.pop("hasTransparency", None)
-        self.has_audio: bool = kwargs.pop("hasAudio", None)
-        self.gfy_id: str = kwargs.pop("gfyId", None)
-        self.gfy_name: str = kwargs.pop("gfyName", None)
-        self.width: int = kwargs.pop("width", None)
-        self.height: int = kwargs.pop("height", None)
-        self.frame_rate: float = kwargs.pop("frameRate", None)
-        self.num_frames: int = kwargs.pop("numFrames", None)
-        self.mp4_size: int = kwargs.pop("mp4Size", None)
-        self.webm_size: int = kwargs.pop("webmSize", None)
-        self.create_date: datetime = datetime.fromtimestamp(
-            kwargs.pop("createDate", None)
-        )
-        self.source: int = kwargs.pop("source", None)
-        self.gfy_slug: str = kwargs.pop("gfySlug", None)
-        self.md5: str = kwargs.pop("md5", None)
-        self.rating: typing.Any = kwargs.pop("rating", None)
-        self.avg_color: str = kwargs.pop("avgColor", None)
-        self.user_display_name: str = kwargs.pop("userDisplayName", None)
-        self.user_profile_image_url: str = kwargs.pop("userProfileImageUrl", None)
+        self._parsed = None
 
     @staticmethod
     def from_dict(http, source):
-        return Gfy(http, **source)
+        # copies the payload once instead of unpacking it into kwargs first
+        gfy = Gfy.__new__(Gfy)
+        dict.update(gfy, source)
+        gfy._http = http
+        gfy._parsed = None
+        return gfy
 
     @staticmethod
     def from_dict_list(http, source):
         return [Gfy.from_dict(http, gfy) for gfy in source]
 
-    def set_title(self, new_title):
-        payload = {"value": new_title}
+    def _cached_routes(self):
+        return [Route("GET", "/gfycats/{id}", id=self["gfyId"])]
 
+    def set_title(self, new_title):
         return self._http.request(
             Route("PUT", "/me/gfycats/{id}/title", id=self["gfyId"]),
-            data=json.dumps(payload),
+            json={"value": new_title},
+            invalidate=self._cached_routes(),
+        )
+
+    def set_tags(self, tags):
+        return self._http.request(
+            Route("PUT", "/me/gfycats/{id}/tags", id=self["gfyId"]),
+            json={"value": tags},
+            invalidate=self._cached_routes(),
         )
 
     def delete_title(self):
         return self._http.request(
-            Route("DELETE", "/me/gfycats/{id}/title", id=self["gfyId"])
+            Route("DELETE", "/me/gfycats/{id}/title", id=self["gfyId"]),
+            invalidate=self._cached_routes(),
         )
 
     def delete(self):
-        return self._http.request(Route("DELETE", "/me/gfycats/{id}", id=self["gfyId"]))
+        return self._http.request(
+            Route("DELETE", "/me/gfycats/{id}", id=self["gfyId"]),
+            invalidate=self._cached_routes(),
+        )
@@ -1,2 +1,111 @@
+import heapq
+import itertools
+
+
 def is_pending(gfy):
     return gfy.gatekeeper == 5
+
+
+class aclosing:
+    """
+    Closes an async generator with aclose() when the block is left, e.g. by a break out of async for,
+    instead of whenever it is garbage collected. Like contextlib.aclosing, which needs Python 3.10.
+    """
+
+    def __init__(self, agen):
+        self._agen = agen
+
+    async def __aenter__(self):
+        return self._agen
+
+    async def __aexit__(self, *exc_info):
+        await self._agen.aclose()
+
+
+class _Inverted:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class TopK:
+    """
+    Keeps the k items with the largest (or, if not desc, smallest) keys seen so far in O(k) memory.
+    Ties are resolved in favor of the item that was pushed first, just like a stable sort.
+    """
+
+    def __init__(self, k, key, desc=True):
+        self._k = k
+        self._key = key
+        self._desc = desc
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, item):
+        index = next(self._counter)
+        if self._desc:
+            rank = (self._key(item), -index)
+        else:
+            rank = _Inverted((self._key(item), index))
+
+        if len(self._heap) < self._k:
+            heapq.heappush(self._heap, (rank, item))
+        elif self._k > 0:
+            heapq.heappushpop(self._heap, (rank, item))
+
+    def result(self):
+        return [item for _, item in sorted(self._heap, reverse=True)]
+
+
+class FeedCollector:
+    """
+    Filters and sorts gfys while they stream in. With both sort_by and max_results, only the best
+    max_results gfys are kept; with max_results alone, collecting stops as soon as there are enough.
+    """
+
+    def __init__(
+        self, sort_by=None, desc=True, filter_predicate=None, max_results=None
+    ):
+        self._sort_by = sort_by
+        self._desc = desc
+        self._filter_predicate = filter_predicate
+        self._max_results = max_results
+
+        if sort_by and max_results is not None:
+            self._top = TopK(max_results, self._sort_key, desc)
+        else:
+            self._top = None
+            self._gfycats = []
+
+    def _sort_key(self, gfy):
+        return getattr(gfy, self._sort_by)
+
+    def add(self, gfy):
+        """
+        Returns False once no more gfys are needed.
+        """
+        if self._filter_predicate and not self._filter_predicate(gfy):
+            return True
+
+        if self._top is not None:
+            self._top.push(gfy)
+            return True
+
+        if self._max_results is not None and len(self._gfycats) >= self._max_results:
+            return False
+
+        self._gfycats.append(gfy)
+        return self._max_results is None or len(self._gfycats) < self._max_results
+
+    def result(self):
+        if self._top is not None:
+            return self._top.result()
+
+        if self._sort_by:
+            return sorted(self._gfycats, key=self._sort_key, reverse=self._desc)
+
+        return self._gfycats
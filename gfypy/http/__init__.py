@@ -1,8 +1,25 @@
-try:
-    from .async_http import AsyncHttpClient
-except ImportError:
-    pass
+from .._lazy import lazy_attributes
 
-from .sync_http import SyncHttpClient
+_LAZY_ATTRIBUTES = {
+    "AsyncHttpClient": ".async_http",
+    "Metrics": ".metrics",
+    "PoolConfig": ".pool",
+    "ResponseCache": ".cache",
+    "RetryPolicy": ".retry",
+    "SyncHttpClient": ".sync_http",
+}
+# names that need an extra, which may not be installed
+_OPTIONAL_ATTRIBUTES = {"AsyncHttpClient": "async"}
 
-__all__ = ["AsyncHttpClient", "SyncHttpClient"]
+__getattr__, __dir__ = lazy_attributes(
+    globals(), _LAZY_ATTRIBUTES, _OPTIONAL_ATTRIBUTES
+)
+
+__all__ = [
+    "AsyncHttpClient",
+    "Metrics",
+    "PoolConfig",
+    "ResponseCache",
+    "RetryPolicy",
+    "SyncHttpClient",
+]
@@ -1,6 +1,232 @@
+import time
+
+from gfypy.http.codec import get_codec
+from gfypy.http.metrics import Metrics
+from gfypy.http.retry import RetryPolicy
+from gfypy.route import Route
+
+
+class BearerAuth:
+    def __init__(self, token):
+        self.token = token
+
+    @property
+    def header(self):
+        return "Bearer " + self.token
+
+
 class AbstractHttpClient:
+    # how often a request is sent again after the API responded with a 429
+    MAX_THROTTLED_RETRIES = 5
+    # how many seconds before it expires the access token is refreshed
+    REFRESH_MARGIN = 60
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        retry_policy=None,
+        response_cache=None,
+        codec=None,
+        metrics=None,
+    ):
+        self.codec = get_codec(codec)
+        self.metrics = metrics or Metrics()
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._response_cache = response_cache
+        self._auth = None
+        self._expires_at = None
+        # shares the credentials with other processes; see refresh_credentials
+        self.credential_store = None
+        self.creds = {
+            "access_token": None,
+            "expires_in": None,
+            "refresh_token": None,
+            "refresh_token_expires_in": None,
+            "resource_owner": None,
+        }
+
+    @property
+    def stats(self):
+        return self.metrics.totals
+
+    @property
+    def creds(self):
+        return self._creds
+
+    @creds.setter
+    def creds(self, creds):
+        self._creds = creds
+
+        # expires_in is relative to when the token was issued, so the absolute expiry is stored alongside it
+        if "expires_at" not in creds and creds.get("expires_in"):
+            creds["expires_at"] = time.time() + float(creds["expires_in"])
+        self._expires_at = creds.get("expires_at")
+
+    def _set_token(self, creds):
+        self.creds = creds
+        self.auth = creds["access_token"]
+
+        if self.credential_store is not None:
+            self.credential_store.save(self.creds)
+
+    def _adopt_stored_creds(self):
+        """
+        Compare-and-swap step of a refresh: if another process has replaced the tokens in the credential
+        store since we loaded them, ours have probably been invalidated, so the stored ones are used instead.
+        Returns whether the adopted access token is fresh enough to skip the refresh.
+        """
+        creds = self.credential_store.load()
+
+        if (
+            not creds
+            or not creds.get("access_token")
+            or (
+                creds.get("access_token") == self.creds.get("access_token")
+                and creds.get("refresh_token") == self.creds.get("refresh_token")
+            )
+        ):
+            return False
+
+        self.creds = creds
+        self.auth = creds["access_token"]
+        return not self.token_expiring
+
+    @property
+    def token_expiring(self):
+        """
+        Whether the access token expires soon enough that it should be refreshed before the next request.
+        """
+        return (
+            self._auth is not None
+            and self._expires_at is not None
+            and time.time() >= self._expires_at - self.REFRESH_MARGIN
+        )
+
+    @property
+    def auth(self):
+        return self._auth
+
+    @auth.setter
+    def auth(self, token):
+        self._auth = BearerAuth(token)
+
+    @property
+    def _token(self):
+        return self._auth.token if self._auth is not None else None
+
+    def _oauth_token_request(self, payload, **kwargs):
+        # the token endpoint authenticates via the payload and must never trigger a refresh itself
+        kwargs.setdefault("no_auth", True)
+        kwargs.setdefault("refresh", False)
+
+        return self.request(Route("POST", "/oauth/token"), json=payload, **kwargs)
+
     def close(self):
         raise NotImplementedError
 
     def request(self, route, **kwargs):
         raise NotImplementedError
+
+    def _encode_json(self, kwargs):
+        """
+        Replaces a json request argument by its encoded body.
+        """
+        if "json" in kwargs:
+            kwargs["data"] = self.codec.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                "content-type": "application/json",
+            }
+
+    def _request_headers(self, no_auth, kwargs):
+        headers = kwargs.get("headers") or {}
+
+        if self._auth is not None and not no_auth:
+            headers = {**headers, "authorization": self._auth.header}
+
+        return headers
+
+    def _decode(self, headers, body, encoding):
+        media_type = headers.get("content-type", "").split(";")[0].strip()
+
+        if media_type == "application/json":
+            return self.codec.loads(body)
+
+        return body.decode(encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def _body_size(kwargs):
+        data = kwargs.get("data")
+
+        try:
+            return len(data or b"")
+        except TypeError:
+            # streamed bodies of unknown length count what has been sent of them
+            return getattr(data, "bytes_read", 0)
+
+    @staticmethod
+    def _rewind(kwargs):
+        """
+        Prepares the request body to be sent again. Returns False if the body can't be replayed.
+        """
+        data = kwargs.get("data")
+
+        if data is None or isinstance(data, (str, bytes, dict)):
+            return True
+        elif hasattr(data, "rewind"):
+            return data.rewind()
+
+        return False
+
+    def _cache_lookup(self, route, kwargs):
+        """
+        Looks up a GET request in the response cache. If the cached response is stale, the request is made
+        conditional so the API can confirm it with a 304 instead of sending it again.
+        """
+        if self._response_cache is None or route.method != "GET":
+            return None, None
+
+        key = self._response_cache.key(route, kwargs.get("params"))
+        entry = self._response_cache.get(key)
+
+        if entry is None or not entry.fresh:
+            self.metrics.count("cache_misses", route)
+        else:
+            self.metrics.count("cache_hits", route)
+
+        if entry is not None and not entry.fresh:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **entry.validators}
+
+        return key, entry
+
+    def _cache_revalidated(self, route, entry):
+        self.metrics.count("cache_revalidations", route)
+        self._response_cache.revalidated(entry)
+        return entry.content
+
+    def _cache_store(self, key, content, headers, invalidate):
+        if self._response_cache is None:
+            return
+
+        if key is not None:
+            self._response_cache.put(key, content, headers)
+
+        for route in invalidate:
+            self._response_cache.invalidate(route.url)
+
+    def _should_retry(self, route, kwargs, attempt):
+        if not self._retry_policy.is_retryable(route.method, attempt):
+            return False
+
+        if not self._rewind(kwargs):
+            return False
+
+        if not self._retry_policy.withdraw():
+            self.metrics.count("retry_budget_exhausted", route)
+            return False
+
+        self.metrics.count("retries", route)
+        return True
@@ -1,74 +1,450 @@
-import json
+import asyncio
+import contextlib
+import itertools
+import logging
 
 import aiohttp
 
 from gfypy.const import REDIRECT_URI
-from gfypy.exceptions import GfypyAuthException, GfypyApiException
+from gfypy.download import CHUNK_SIZE, PartialDownload
+from gfypy.exceptions import GfypyAuthException, GfypyApiException, GfypyException
 from gfypy.http.abstract_http import AbstractHttpClient
-from gfypy.route import Route
+from gfypy.http.pool import PoolConfig
+from gfypy.http.ratelimit import AbstractRateLimiter
+from gfypy.http.transport import (
+    StreamedResponse,
+    Transport,
+    TransportResponse,
+    async_body,
+    load_transport,
+)
+from gfypy.route import MediaRoute
 
+logger = logging.getLogger(__name__)
 
-class BearerAuth(aiohttp.BasicAuth):
-    def __init__(self, token):
-        self.token = token
 
-    def encode(self):
-        return "Bearer " + self.token
+class AsyncRateLimiter(AbstractRateLimiter):
+    async def acquire(self, route):
+        delay = self._reserve(route)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, route, headers):
+        self._update(route, headers)
+
+    def throttled(self, route, headers, attempt):
+        """
+        Pauses the route's family after a 429, so that the retry waits for it in acquire.
+        """
+        self._update(route, headers, self._throttled_delay(headers, attempt))
+
+
+class AiohttpTransport(Transport):
+    """
+    Sends requests with aiohttp over HTTP/1.1. Further options are passed to aiohttp.ClientSession.
+    The session is only created by the first request, since it belongs to the event loop it is created in.
+    """
+
+    name = "aiohttp"
+    TRANSIENT_ERRORS = (
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+        asyncio.TimeoutError,
+    )
+
+    def __init__(self, pool=None, **options):
+        self._pool = pool or PoolConfig()
+        self._options = options
+        self._session = None
+
+    def _create_session(self):
+        pool, options = self._pool, dict(self._options)
+
+        if "connector" not in options:
+            connector = {}
+            if pool.size is not None:
+                connector["limit"] = pool.size
+            if pool.keepalive is not None:
+                connector["keepalive_timeout"] = pool.keepalive
+            if pool.dns_ttl is not None:
+                connector["ttl_dns_cache"] = pool.dns_ttl
+            options["connector"] = aiohttp.TCPConnector(**connector)
+
+        if "timeout" not in options:
+            options["timeout"] = aiohttp.ClientTimeout(
+                total=aiohttp.client.DEFAULT_TIMEOUT.total,
+                sock_connect=(
+                    pool.connect_timeout
+                    if pool.connect_timeout is not None
+                    else aiohttp.client.DEFAULT_TIMEOUT.sock_connect
+                ),
+                sock_read=pool.read_timeout,
+            )
+
+        return aiohttp.ClientSession(**options)
+
+    async def send(self, method, url, headers=None, params=None, data=None):
+        if self._session is None:
+            self._session = self._create_session()
+
+        headers, data = async_body(headers, data)
+
+        async with self._session.request(
+            method, url, headers=headers, params=params, data=data
+        ) as resp:
+            body = await resp.read()
+
+        return TransportResponse(resp.status, resp.headers, body, resp.charset)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method, url, headers=None, chunk_size=64 * 1024):
+        if self._session is None:
+            self._session = self._create_session()
+
+        # a long download may take longer than the total timeout, so only stalls end it
+        timeout = self._session.timeout
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=timeout.sock_connect,
+            sock_read=timeout.sock_read or timeout.total,
+        )
+
+        async with self._session.request(
+            method, url, headers=headers, timeout=timeout
+        ) as resp:
+            yield StreamedResponse(
+                resp.status, resp.headers, resp.content.iter_chunked(chunk_size)
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
 
 
 class AsyncHttpClient(AbstractHttpClient):
-    def __init__(self, client_id, client_secret):
-        self._client_id = client_id
-        self._client_secret = client_secret
-        self._session = aiohttp.ClientSession()
-        self._auth = None
-        self.creds = {
-            "access_token": None,
-            "expires_in": None,
-            "refresh_token": None,
-            "refresh_token_expires_in": None,
-            "resource_owner": None,
-        }
+    # requests that may share one network call with identical concurrent requests
+    COALESCED_METHODS = frozenset(("GET", "HEAD"))
+    # transport name -> "module:class"
+    TRANSPORTS = {
+        "aiohttp": "gfypy.http.async_http:AiohttpTransport",
+        "httpx": "gfypy.http.httpx_transport:AsyncHttpxTransport",
+    }
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        rate_limits=None,
+        retry_policy=None,
+        response_cache=None,
+        pool=None,
+        codec=None,
+        metrics=None,
+        transport="aiohttp",
+    ):
+        super().__init__(
+            client_id, client_secret, retry_policy, response_cache, codec, metrics
+        )
+        self._transport = load_transport(transport, self.TRANSPORTS, pool=pool)
+        self._rate_limiter = AsyncRateLimiter(rate_limits)
+        self._refresh_task = None
+        self._in_flight = {}
 
     async def close(self):
-        await self._session.close()
+        await self._transport.close()
 
     async def request(self, route, **kwargs):
+        """
+        Identical GET requests that are sent while one of them is still in flight share its response or
+        exception instead of making their own network call.
+        """
+        if (
+            route.method not in self.COALESCED_METHODS
+            or "data" in kwargs
+            or "json" in kwargs
+        ):
+            return await self._request(route, **kwargs)
+
+        key = self._coalescing_key(route, kwargs)
+        if key is None:
+            return await self._request(route, **kwargs)
+
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(self._request(route, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._request_done(key, task))
+        else:
+            self.metrics.count("coalesced", route)
+
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _coalescing_key(route, kwargs):
+        """
+        Returns what identifies a request among those in flight, or None if its params or headers can't be
+        part of a key, e.g. since they contain lists.
+        """
+        try:
+            key = (
+                route.method,
+                route.url,
+                tuple(sorted((kwargs.get("params") or {}).items())),
+                tuple(sorted((kwargs.get("headers") or {}).items())),
+                kwargs.get("no_auth", False),
+            )
+            hash(key)
+        except (AttributeError, TypeError):
+            return None
+
+        return key
+
+    def _request_done(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # retrieves the exception in case every caller has been cancelled in the meantime
+        if not task.cancelled():
+            task.exception()
+
+    async def _request(self, route, **kwargs):
         no_auth = kwargs.pop("no_auth", False)
         refresh = kwargs.pop("refresh", True)
+        cache = kwargs.pop("cache", False)
+        # cached routes that a successful request changes
+        invalidate = kwargs.pop("invalidate", ())
+        self._encode_json(kwargs)
 
-        async with self._session.request(
-            route.method, route.url, **kwargs, auth=self._auth if not no_auth else None
-        ) as resp:
-            content_type = resp.headers.get("content-type")
-            if content_type == "application/json":
-                content = await resp.json()
-            else:
-                content = await resp.text()
+        cache_key, cached = self._cache_lookup(route, kwargs) if cache else (None, None)
+        if cached is not None and cached.fresh:
+            return cached.content
 
-            if 200 <= resp.status < 300:
-                return content
-            elif resp.status in [401, 403]:
-                if refresh:
-                    # try to refresh the oauth token in case it's become invalid
-                    await self.refresh_oauth_token()
+        if not no_auth and (self._refresh_task is not None or self.token_expiring):
+            await self._refresh_once(self._token)
+        token = self._token
 
-                    return await self.request(route, **kwargs, refresh=False)
-                else:
-                    if "message" in content:
-                        raise GfypyAuthException(content["message"], resp.status, None)
-                    else:
-                        raise GfypyAuthException(
-                            content["errorMessage"]["description"],
-                            resp.status,
-                            content["errorMessage"]["code"],
-                        )
+        for attempt in itertools.count():
+            await self._rate_limiter.acquire(route)
+            self._retry_policy.record_request()
+
+            try:
+                resp = await self._send(route, no_auth, kwargs)
+            except self._transport.TRANSIENT_ERRORS:
+                if not self._should_retry(route, kwargs, attempt):
+                    raise
+
+                await asyncio.sleep(self._retry_policy.delay(attempt))
+                continue
+
+            if (
+                resp.status == 429
+                and attempt < self.MAX_THROTTLED_RETRIES
+                and self._rewind(kwargs)
+            ):
+                self.metrics.count("throttled", route)
+                self._rate_limiter.throttled(route, resp.headers, attempt)
+                continue
+
+            self._rate_limiter.update(route, resp.headers)
+
+            if resp.status in self._retry_policy.RETRY_STATUSES and self._should_retry(
+                route, kwargs, attempt
+            ):
+                await asyncio.sleep(self._retry_policy.delay(attempt))
+                continue
+
+            break
+
+        if cached is not None and resp.status == 304:
+            return self._cache_revalidated(route, cached)
+
+        content = self._decode(resp.headers, resp.body, resp.encoding)
+
+        if 200 <= resp.status < 300:
+            self._cache_store(cache_key, content, resp.headers, invalidate)
+            return content
+        elif resp.status in [401, 403]:
+            if refresh and self._rewind(kwargs):
+                # try to refresh the oauth token in case it's become invalid
+                await self._refresh_once(token)
+
+                return await self._request(
+                    route,
+                    **kwargs,
+                    no_auth=no_auth,
+                    refresh=False,
+                    cache=cache,
+                    invalidate=invalidate,
+                )
             else:
-                raise GfypyApiException(
-                    content["errorMessage"] if "message" in content else content,
-                    resp.status,
+                if "message" in content:
+                    raise GfypyAuthException(content["message"], resp.status, None)
+                else:
+                    raise GfypyAuthException(
+                        content["errorMessage"]["description"],
+                        resp.status,
+                        content["errorMessage"]["code"],
+                    )
+        else:
+            raise GfypyApiException(
+                content["errorMessage"] if "message" in content else content,
+                resp.status,
+            )
+
+    async def _send(self, route, no_auth, kwargs):
+        started = self.metrics.start(route)
+        # a body is only counted once it has been answered, since a failed attempt is rewound and sent again
+        status, received, sent = "error", 0, 0
+
+        try:
+            resp = await self._transport.send(
+                route.method,
+                route.url,
+                headers=self._request_headers(no_auth, kwargs),
+                params=kwargs.get("params"),
+                data=kwargs.get("data"),
+            )
+
+            status, received = resp.status, len(resp.body)
+            sent = self._body_size(kwargs)
+            return resp
+        finally:
+            self.metrics.finish(route, started, status, received, sent)
+
+    async def download(self, url, path, size=None, md5=None, chunk_size=CHUNK_SIZE):
+        """
+        Streams url to path chunk by chunk, so memory use doesn't depend on the size of the file, and returns
+        the path. An interrupted transfer is resumed with a Range request, by this call or by a later one for
+        the same path. size and md5 are verified if they are given. The file is written off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        download = PartialDownload(path, size, md5)
+        if download.complete:
+            return download.path
+
+        route = MediaRoute(url)
+        attempt = 0
+        while True:
+            offset, error = download.offset, None
+
+            try:
+                if await self._receive(route, download, chunk_size):
+                    return await loop.run_in_executor(None, download.finish)
+            except self._transport.TRANSIENT_ERRORS as e:
+                error = e
+            except GfypyApiException as e:
+                if e.status_code not in self._retry_policy.RETRY_STATUSES:
+                    raise
+                error = e
+            finally:
+                download.close()
+
+            # only attempts that received nothing count against the retries
+            if download.offset > offset:
+                attempt = 0
+
+            if not self._should_retry(route, {}, attempt):
+                if error is not None:
+                    raise error
+                raise GfypyException(
+                    f"The download of {url} ended after {download.offset} of {size} bytes."
                 )
 
+            await asyncio.sleep(self._retry_policy.delay(attempt))
+            attempt += 1
+
+    async def _receive(self, route, download, chunk_size):
+        """
+        Sends one request for what is missing of download. Returns False if the transfer ended early.
+        """
+        loop = asyncio.get_running_loop()
+        started = self.metrics.start(route)
+        status, received = "error", download.received
+
+        try:
+            async with self._transport.stream(
+                route.method, route.url, download.request_headers(), chunk_size
+            ) as resp:
+                status = resp.status
+
+                if await loop.run_in_executor(
+                    None, download.start, resp.status, resp.headers
+                ):
+                    async for chunk in resp.chunks:
+                        await loop.run_in_executor(None, download.write, chunk)
+        finally:
+            self.metrics.finish(route, started, status, download.received - received, 0)
+
+        return not download.incomplete
+
+    async def warm_up(self, urls, connections=1):
+        """
+        Opens connections to the hosts of urls ahead of the first requests, so those don't wait for DNS, TCP
+        and TLS. Failures are only logged, since the requests will connect on their own anyway.
+        """
+        await asyncio.gather(
+            *(self._open_connection(url) for url in urls for _ in range(connections))
+        )
+
+    async def _open_connection(self, url):
+        try:
+            await self._transport.send("HEAD", url)
+            self.metrics.count("warm_up_connections")
+        except Exception as e:
+            logger.debug("Warming up a connection to %s failed: %s", url, e)
+
+    async def _refresh_once(self, token):
+        """
+        Refreshes the access token unless another request has already replaced the given one.
+        Concurrent callers wait for the same refresh instead of starting their own.
+        """
+        if self._refresh_task is None:
+            if token != self._token:
+                return
+
+            self._refresh_task = asyncio.ensure_future(self.refresh_credentials())
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+        await asyncio.shield(self._refresh_task)
+
+    async def refresh_credentials(self):
+        """
+        Refreshes the access token. With a credential store, only one process refreshes at a time, and
+        tokens another process has refreshed in the meantime are picked up instead.
+        """
+        if self.credential_store is None:
+            return await self.refresh_oauth_token()
+
+        # waiting for the file lock blocks, so it happens off the event loop
+        acquiring = asyncio.get_running_loop().run_in_executor(
+            None, self.credential_store.acquire
+        )
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # the worker thread still takes the lock, and nobody else would release it
+            acquiring.add_done_callback(self._release_abandoned_lock)
+            raise
+
+        try:
+            if not self._adopt_stored_creds():
+                await self.refresh_oauth_token()
+        finally:
+            self.credential_store.release()
+
+    def _release_abandoned_lock(self, acquiring):
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            self.credential_store.release()
+
+    def _refresh_done(self, task):
+        if self._refresh_task is task:
+            self._refresh_task = None
+
+        if not task.cancelled():
+            # marks the exception as retrieved even if every waiter has been cancelled
+            task.exception()
+
     async def get_oauth_token(self, code):
         payload = {
             "code": code,
@@ -78,14 +454,9 @@ class AsyncHttpClient(AbstractHttpClient):
             "redirect_uri": REDIRECT_URI,
         }
 
-        resp = await self.request(
-            Route("POST", "/oauth/token"),
-            data=json.dumps(payload),
-            headers={"content-type": "application/json"},
-        )
+        resp = await self._oauth_token_request(payload)
 
-        self.creds = resp
-        self.auth = resp["access_token"]
+        self._set_token(resp)
 
     async def refresh_oauth_token(self, **kwargs):
         payload = {
@@ -95,20 +466,7 @@ class AsyncHttpClient(AbstractHttpClient):
             "grant_type": "refresh",
         }
 
-        resp = await self.request(
-            Route("POST", "/oauth/token"),
-            data=json.dumps(payload),
-            headers={"content-type": "application/json"},
-            **kwargs,
-        )
-
-        self.creds = resp
-        self.auth = resp["access_token"]
-
-    @property
-    def auth(self):
-        return self._auth
+        resp = await self._oauth_token_request(payload, **kwargs)
+        self.metrics.count("token_refreshes")
 
-    @auth.setter
-    def auth(self, token):
-        self._auth = BearerAuth(token)
+        self._set_token(resp)
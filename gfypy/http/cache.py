@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ("content", "expires_at", "etag", "last_modified")
+
+    def __init__(self, content, expires_at, etag=None, last_modified=None):
+        self.content = content
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self):
+        return time.monotonic() < self.expires_at
+
+    @property
+    def validators(self):
+        headers = {}
+        if self.etag is not None:
+            headers["if-none-match"] = self.etag
+        if self.last_modified is not None:
+            headers["if-modified-since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    An in-memory LRU cache for GET responses. Entries are served without a request for ttl seconds; after
+    that they are revalidated with If-None-Match/If-Modified-Since if the API sent an ETag or
+    Last-Modified, and fetched again otherwise. Cached content is shared between callers, so treat it as
+    read-only.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(route, params=None):
+        return route.url, tuple(sorted((params or {}).items()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the entry for the key even if it is stale, since it may still be revalidated.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if entry.fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def put(self, key, content, headers):
+        entry = CacheEntry(
+            content,
+            time.monotonic() + self.ttl,
+            headers.get("etag"),
+            headers.get("last-modified"),
+        )
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, entry):
+        """
+        Marks an entry as fresh again after the API responded with a 304.
+        """
+        with self._lock:
+            entry.expires_at = time.monotonic() + self.ttl
+            self.revalidations += 1
+
+    def invalidate(self, url):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == url]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
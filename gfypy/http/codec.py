@@ -0,0 +1,80 @@
+import json
+
+from gfypy.exceptions import GfypyException
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JsonCodec:
+    """
+    Encodes request bodies to and decodes response bodies from UTF-8 bytes with the standard library.
+    """
+
+    name = "json"
+
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    @staticmethod
+    def dumps(obj):
+        return ujson.dumps(obj).encode()
+
+    @staticmethod
+    def loads(data):
+        return ujson.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    @staticmethod
+    def dumps(obj):
+        return orjson.dumps(obj)
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+# the installed codecs, fastest first
+CODECS = {
+    codec.name: codec
+    for codec, module in (
+        (OrjsonCodec, orjson),
+        (UjsonCodec, ujson),
+        (JsonCodec, json),
+    )
+    if module is not None
+}
+
+
+def get_codec(name=None):
+    """
+    Returns the codec with the given name, or the fastest one that is installed.
+    """
+    if name is None:
+        return next(iter(CODECS.values()))()
+
+    try:
+        return CODECS[name]()
+    except KeyError:
+        raise GfypyException(
+            f"The JSON codec {name} is not installed. Available: {', '.join(CODECS)}."
+        )
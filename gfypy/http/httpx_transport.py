@@ -0,0 +1,127 @@
+import contextlib
+
+import httpx
+
+from gfypy.http.pool import PoolConfig
+from gfypy.http.transport import (
+    StreamedResponse,
+    Transport,
+    TransportResponse,
+    async_body,
+    is_stream,
+    iter_file,
+    stream_headers,
+)
+
+TRANSIENT_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+DEFAULT_LIMITS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 5.0,
+}
+DEFAULT_TIMEOUT = 5.0
+
+
+def _client_options(http2, pool, options):
+    """
+    With HTTP/2, concurrent requests to a host are multiplexed over one connection instead of each taking a
+    connection from the pool. http2 needs the h2 package; without TLS, HTTP/2 is only used if http1 is
+    disabled as well.
+    """
+    pool = pool or PoolConfig()
+    options.setdefault("http2", http2)
+
+    limits = {}
+    if pool.size is not None:
+        limits.update(max_connections=pool.size, max_keepalive_connections=pool.size)
+    if pool.keepalive is not None:
+        limits["keepalive_expiry"] = pool.keepalive
+    if limits:
+        options.setdefault("limits", httpx.Limits(**{**DEFAULT_LIMITS, **limits}))
+
+    timeouts = {}
+    if pool.connect_timeout is not None:
+        timeouts["connect"] = pool.connect_timeout
+    if pool.read_timeout is not None:
+        timeouts["read"] = pool.read_timeout
+    if timeouts:
+        options.setdefault("timeout", httpx.Timeout(DEFAULT_TIMEOUT, **timeouts))
+
+    return options
+
+
+def _body(data):
+    if data is None or isinstance(data, dict):
+        return {"data": data}
+
+    return {"content": data}
+
+
+class HttpxTransport(Transport):
+    """
+    Sends requests with httpx. Further options are passed to httpx.Client.
+    HTTP/2 is off by default: httpcore doesn't lock the shared HTTP/2 connection state of the sync client, so
+    requests from several worker threads can corrupt it.
+    """
+
+    name = "httpx"
+    TRANSIENT_ERRORS = TRANSIENT_ERRORS
+
+    def __init__(self, http2=False, pool=None, **options):
+        self._client = httpx.Client(**_client_options(http2, pool, options))
+
+    def send(self, method, url, headers=None, params=None, data=None):
+        if is_stream(data):
+            headers, data = stream_headers(headers, data), iter_file(data)
+
+        resp = self._client.request(
+            method, url, headers=headers, params=params, **_body(data)
+        )
+        return TransportResponse(
+            resp.status_code, resp.headers, resp.content, resp.charset_encoding
+        )
+
+    @contextlib.contextmanager
+    def stream(self, method, url, headers=None, chunk_size=64 * 1024):
+        with self._client.stream(method, url, headers=headers) as resp:
+            yield StreamedResponse(
+                resp.status_code, resp.headers, resp.iter_bytes(chunk_size)
+            )
+
+    def close(self):
+        self._client.close()
+
+
+class AsyncHttpxTransport(Transport):
+    """
+    Sends requests with httpx, over HTTP/2 by default. Further options are passed to httpx.AsyncClient.
+    """
+
+    name = "httpx"
+    TRANSIENT_ERRORS = TRANSIENT_ERRORS
+
+    def __init__(self, http2=True, pool=None, **options):
+        self._client = httpx.AsyncClient(**_client_options(http2, pool, options))
+
+    async def send(self, method, url, headers=None, params=None, data=None):
+        headers, data = async_body(headers, data)
+        resp = await self._client.request(
+            method, url, headers=headers, params=params, **_body(data)
+        )
+        return TransportResponse(
+            resp.status_code, resp.headers, resp.content, resp.charset_encoding
+        )
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method, url, headers=None, chunk_size=64 * 1024):
+        async with self._client.stream(method, url, headers=headers) as resp:
+            yield StreamedResponse(
+                resp.status_code, resp.headers, resp.aiter_bytes(chunk_size)
+            )
+
+    async def close(self):
+        await self._client.aclose()
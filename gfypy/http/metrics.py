@@ -0,0 +1,274 @@
+import bisect
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns (upper bound, number of observations up to it) pairs, ending with +Inf.
+        """
+        total = 0
+        pairs = []
+
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            pairs.append((bound, total))
+
+        return pairs
+
+
+class RouteMetrics:
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.statuses = Counter()
+        self.counters = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.in_flight = 0
+
+
+class Metrics:
+    """
+    Collects what the HTTP clients do per route template, e.g. GET /gfycats/{id} rather than every gfy's URL.
+    totals holds the same counters summed over all routes, plus the ones that don't belong to a route.
+    """
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    PREFIX = "gfypy"
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.LATENCY_BUCKETS)
+        self.totals = Counter()
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def _route(self, route):
+        key = (route.method, route.template)
+
+        if key not in self._routes:
+            self._routes[key] = RouteMetrics(self.buckets)
+
+        return self._routes[key]
+
+    def count(self, name, route=None, value=1):
+        with self._lock:
+            self.totals[name] += value
+
+            if route is not None:
+                self._route(route).counters[name] += value
+
+    def start(self, route):
+        with self._lock:
+            self._route(route).in_flight += 1
+
+        return time.perf_counter()
+
+    def finish(self, route, started, status, bytes_in, bytes_out):
+        """
+        Records a request that has been started with start(). status is "error" if no response was received.
+        """
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            metrics = self._route(route)
+            metrics.in_flight -= 1
+            metrics.latency.observe(elapsed)
+            metrics.statuses[str(status)] += 1
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+
+            self.totals["requests"] += 1
+            self.totals["bytes_in"] += bytes_in
+            self.totals["bytes_out"] += bytes_out
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "totals": dict(self.totals),
+                "routes": [
+                    {
+                        "method": method,
+                        "route": template,
+                        "in_flight": metrics.in_flight,
+                        "statuses": dict(metrics.statuses),
+                        "bytes_in": metrics.bytes_in,
+                        "bytes_out": metrics.bytes_out,
+                        "counters": dict(metrics.counters),
+                        "latency": {
+                            "count": metrics.latency.count,
+                            "sum": metrics.latency.sum,
+                            "buckets": metrics.latency.cumulative(),
+                        },
+                    }
+                    for (method, template), metrics in self._routes.items()
+                ],
+            }
+
+    def prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        routes = snapshot["routes"]
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {self.PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(
+                    f"{self.PREFIX}_{name}{suffix}{_labels(labels)} {_number(value)}"
+                )
+
+        def route_labels(route, **labels):
+            return {"method": route["method"], "route": route["route"], **labels}
+
+        family(
+            "requests_total",
+            "counter",
+            "HTTP requests by route and status code.",
+            [
+                ("", route_labels(route, status=status), count)
+                for route in routes
+                for status, count in sorted(route["statuses"].items())
+            ],
+        )
+        family(
+            "request_duration_seconds",
+            "histogram",
+            "Time until the response has been read.",
+            [
+                sample
+                for route in routes
+                for sample in (
+                    *(
+                        ("_bucket", route_labels(route, le=_number(bound)), count)
+                        for bound, count in route["latency"]["buckets"]
+                    ),
+                    ("_sum", route_labels(route), route["latency"]["sum"]),
+                    ("_count", route_labels(route), route["latency"]["count"]),
+                )
+            ],
+        )
+        family(
+            "response_bytes_total",
+            "counter",
+            "Bytes received in response bodies.",
+            [("", route_labels(route), route["bytes_in"]) for route in routes],
+        )
+        family(
+            "request_bytes_total",
+            "counter",
+            "Bytes sent in request bodies.",
+            [("", route_labels(route), route["bytes_out"]) for route in routes],
+        )
+        family(
+            "requests_in_flight",
+            "gauge",
+            "Requests waiting for a response.",
+            [("", route_labels(route), route["in_flight"]) for route in routes],
+        )
+
+        route_counters = sorted(
+            {name for route in routes for name in route["counters"]}
+        )
+        for name in route_counters:
+            family(
+                f"{name}_total",
+                "counter",
+                f"{name.replace('_', ' ').capitalize()} by route.",
+                [
+                    ("", route_labels(route), route["counters"][name])
+                    for route in routes
+                    if name in route["counters"]
+                ],
+            )
+
+        for name, value in sorted(snapshot["totals"].items()):
+            if name not in route_counters and name not in (
+                "requests",
+                "bytes_in",
+                "bytes_out",
+            ):
+                family(
+                    f"{name}_total",
+                    "counter",
+                    f"{name.replace('_', ' ').capitalize()}.",
+                    [("", {}, value)],
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Writes the metrics to a file, e.g. for the textfile collector of the node exporter. The file is
+        replaced atomically, so a scraper never reads a partial one.
+        """
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name)
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(self.prometheus())
+
+            os.replace(tmp_path, str(path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """
+        Serves the metrics on http://host:port/metrics from a background thread.
+        Returns the server; call its shutdown() method to stop it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,189 @@
+import io
+import os
+import stat
+import uuid
+
+BYTES_LIKE = (bytes, bytearray, memoryview)
+
+
+class MultipartEncoder:
+    """
+    Streams a multipart/form-data body chunk by chunk so that files are sent straight from disk.
+    files maps field names to (filename, source) or (filename, source, size). A source is a file-like object,
+    a bytes-like object, which is sent from where it is instead of being copied into the body, or an async
+    iterable of bytes, which only the async client can send. Without a size, a stream that can't seek makes
+    the length of the body unknown, so it is sent chunked.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields=None, files=None, callback=None):
+        self.boundary = uuid.uuid4().hex
+        self.callback = callback
+        self.bytes_read = 0
+
+        self._parts = []
+        self._positions = []
+        self._rewindable = True
+        sizes = []
+        for name, value in (fields or {}).items():
+            self._parts.append(
+                self._header(name) + str(value).encode("utf-8") + b"\r\n"
+            )
+        for name, (filename, source, *size) in (files or {}).items():
+            self._parts.append(self._header(name, filename))
+
+            if isinstance(source, BYTES_LIKE):
+                source = memoryview(source).cast("B")
+                size = [source.nbytes]
+            elif not hasattr(source, "__aiter__") and self._seekable(source):
+                self._positions.append((source, source.tell()))
+            else:
+                self._rewindable = False
+
+            self._parts.append(source)
+            self._parts.append(b"\r\n")
+            sizes.append(size[0] if size else self._remaining(source))
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        if None in sizes:
+            self._len = None
+        else:
+            self._len = sum(sizes) + sum(
+                len(part) for part in self._parts if isinstance(part, bytes)
+            )
+        self._current = 0
+        self._offset = 0
+
+    def _header(self, name, filename=None):
+        lines = [f"--{self.boundary}", f'Content-Disposition: form-data; name="{name}"']
+        if filename is not None:
+            lines[1] += f'; filename="{filename}"'
+            lines.append("Content-Type: application/octet-stream")
+
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+    @staticmethod
+    def _seekable(file):
+        try:
+            return file.seekable()
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    @classmethod
+    def _remaining(cls, file):
+        """
+        Returns how many bytes are left in the file, or None if that can't be known before reading it.
+        """
+        try:
+            status = os.fstat(file.fileno())
+            if stat.S_ISREG(status.st_mode):
+                return status.st_size - file.tell()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+
+        if hasattr(file, "__aiter__") or not cls._seekable(file):
+            return None
+
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return size - position
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __bool__(self):
+        return True
+
+    def __len__(self):
+        if self._len is None:
+            raise TypeError("The length of the body is unknown.")
+
+        return self._len
+
+    def rewind(self):
+        """
+        Starts the body over so that the request can be sent again. Returns False if that is impossible since
+        part of a stream that can't seek has been sent already.
+        """
+        if not self._rewindable and self.bytes_read:
+            return False
+
+        for file, position in self._positions:
+            file.seek(position)
+
+        self.bytes_read = 0
+        self._current = 0
+        self._offset = 0
+        return True
+
+    def _advance(self, chunk):
+        self.bytes_read += len(chunk)
+        if self.callback is not None and chunk:
+            self.callback(self.bytes_read, self._len)
+        return chunk
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+
+        chunks = []
+        while size != 0 and self._current < len(self._parts):
+            part = self._parts[self._current]
+
+            if isinstance(part, (bytes, memoryview)):
+                end = len(part) if size < 0 else self._offset + size
+                offset = self._offset
+                chunk = part[offset:end]
+                self._offset += len(chunk)
+                if self._offset >= len(part):
+                    self._current += 1
+                    self._offset = 0
+            elif hasattr(part, "__aiter__"):
+                raise TypeError("Async iterables can only be uploaded by AsyncGfypy.")
+            else:
+                chunk = part.read(size)
+                if not chunk:
+                    self._current += 1
+                    continue
+
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+        return self._advance(b"".join(chunks))
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+    async def __aiter__(self):
+        """
+        Yields the body for the async client. Files are read off the event loop and bytes-like sources are
+        sent in slices, without copying them.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield self._advance(part)
+            elif isinstance(part, memoryview):
+                for start in range(0, len(part), self.CHUNK_SIZE):
+                    end = start + self.CHUNK_SIZE
+                    yield self._advance(part[start:end])
+            elif hasattr(part, "__aiter__"):
+                async for chunk in part:
+                    yield self._advance(chunk)
+            else:
+                while True:
+                    chunk = await loop.run_in_executor(None, part.read, self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield self._advance(chunk)
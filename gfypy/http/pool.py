@@ -0,0 +1,27 @@
+class PoolConfig:
+    """
+    How a client's transport connects to the API. Settings left at None keep the backend's default.
+    size: connections kept open for reuse (requests: 10 per host, aiohttp and httpx: 100)
+    keepalive: seconds an idle connection stays open (aiohttp: 15, httpx: 5, requests: until the server closes it)
+    dns_ttl: seconds a resolved address is cached (aiohttp: 10; requests and httpx resolve every new connection)
+    connect_timeout: seconds to wait for a connection (aiohttp: 30, httpx: 5, requests: no limit)
+    read_timeout: seconds to wait for the next chunk of a response (httpx: 5, requests and aiohttp: no limit,
+    but aiohttp gives up on a request after 5 minutes)
+    """
+
+    def __init__(
+        self,
+        size=None,
+        keepalive=None,
+        dns_ttl=None,
+        connect_timeout=None,
+        read_timeout=None,
+    ):
+        self.size = size
+        self.keepalive = keepalive
+        self.dns_ttl = dns_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def replace(self, **changes):
+        return PoolConfig(**{**vars(self), **changes})
@@ -0,0 +1,155 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Hands out one token per request at the given rate, allowing bursts of up to capacity requests.
+    Tokens are reserved up front, so waiting callers are served in the order they arrived.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        if now > self._last:
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+
+    def reserve(self):
+        """
+        Takes a token and returns how many seconds the caller needs to wait before using it.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+
+        return max(0.0, self._last - now + max(0.0, -self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        """
+        Hands out no more tokens for the given number of seconds, e.g. after the API responded with a 429.
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        until = now + seconds
+        if until > self._last:
+            self._tokens = min(self._tokens, 0)
+            self._last = until
+
+
+def parse_retry_after(headers):
+    """
+    Returns how many seconds the response headers ask us to wait, or None if they don't say.
+    """
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            return max(
+                0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+            )
+        except (TypeError, ValueError):
+            pass
+
+    remaining = headers.get("x-ratelimit-remaining")
+    reset = headers.get("x-ratelimit-reset")
+    if remaining is not None and reset is not None:
+        try:
+            if float(remaining) > 0:
+                return None
+
+            reset = float(reset)
+        except ValueError:
+            return None
+
+        # the reset is either an epoch timestamp or a number of seconds
+        if reset > 10 ** 9:
+            reset -= time.time()
+        return max(0.0, reset)
+
+    return None
+
+
+class AbstractRateLimiter:
+    # requests per second and burst size per route family; None disables limiting, but the family is still
+    # paused by 429s and X-RateLimit headers
+    DEFAULT_LIMITS = {"api": None, "filedrop": None}
+    # how long to wait after a 429 that doesn't come with a Retry-After, doubled with every attempt
+    DEFAULT_RETRY_AFTER = 1.0
+
+    def __init__(self, limits=None):
+        limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+
+        self._buckets = {
+            family: TokenBucket(*limit)
+            for family, limit in limits.items()
+            if limit is not None
+        }
+        # monotonic time until which families without a bucket are paused
+        self._paused_until = {}
+
+    def _reserve(self, route):
+        family = getattr(route, "family", None)
+        bucket = self._buckets.get(family)
+        if bucket is not None:
+            return bucket.reserve()
+
+        return max(0.0, self._paused_until.get(family, 0.0) - time.monotonic())
+
+    def _update(self, route, headers, delay=None):
+        """
+        Pauses the route's family for delay seconds, or for as long as the headers ask. The next reservation
+        waits for the pause to end.
+        """
+        if delay is None:
+            delay = parse_retry_after(headers)
+        if not delay:
+            return
+
+        family = getattr(route, "family", None)
+        bucket = self._buckets.get(family)
+        if bucket is not None:
+            bucket.pause(delay)
+        else:
+            until = time.monotonic() + delay
+            self._paused_until[family] = max(self._paused_until.get(family, 0.0), until)
+
+    def _throttled_delay(self, headers, attempt):
+        delay = parse_retry_after(headers)
+        return delay if delay is not None else self.DEFAULT_RETRY_AFTER * 2 ** attempt
+
+
+class RateLimiter(AbstractRateLimiter):
+    def __init__(self, limits=None):
+        super().__init__(limits)
+        self._lock = threading.Lock()
+
+    def acquire(self, route):
+        with self._lock:
+            delay = self._reserve(route)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, route, headers):
+        with self._lock:
+            self._update(route, headers)
+
+    def throttled(self, route, headers, attempt):
+        """
+        Pauses the route's family after a 429, so that the retry waits for it in acquire.
+        """
+        with self._lock:
+            self._update(route, headers, self._throttled_delay(headers, attempt))
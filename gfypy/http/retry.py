@@ -0,0 +1,52 @@
+import random
+import threading
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is sent again and how long to wait before doing so.
+    Only idempotent requests are replayed. Retries are limited per request and by a budget shared by all
+    requests of a client: every request adds budget_ratio to it, up to max_budget, and every retry takes one.
+    That way an outage doesn't multiply the load on the API.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+    RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff=0.5,
+        max_backoff=30.0,
+        budget_ratio=0.2,
+        max_budget=10,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget_ratio = budget_ratio
+        self.max_budget = max_budget
+
+        self._budget = max_budget
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self._budget = min(self._budget + self.budget_ratio, self.max_budget)
+
+    def is_retryable(self, method, attempt):
+        return attempt < self.max_retries and method in self.IDEMPOTENT_METHODS
+
+    def withdraw(self):
+        """
+        Takes one retry from the budget. Returns False if the budget is exhausted.
+        """
+        with self._lock:
+            if self._budget < 1:
+                return False
+
+            self._budget -= 1
+            return True
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
@@ -1,80 +1,315 @@
-import json
+import contextlib
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from gfypy.const import REDIRECT_URI
-from gfypy.exceptions import GfypyAuthException, GfypyApiException
+from gfypy.download import CHUNK_SIZE, PartialDownload
+from gfypy.exceptions import GfypyAuthException, GfypyApiException, GfypyException
 from gfypy.http.abstract_http import AbstractHttpClient
-from gfypy.route import Route
+from gfypy.http.pool import PoolConfig
+from gfypy.http.ratelimit import RateLimiter
+from gfypy.http.transport import (
+    StreamedResponse,
+    Transport,
+    TransportResponse,
+    is_stream,
+    iter_file,
+    load_transport,
+    stream_size,
+)
+from gfypy.route import MediaRoute
 
+logger = logging.getLogger(__name__)
 
-class BearerAuth(requests.auth.AuthBase):
-    def __init__(self, token):
-        self.token = token
 
-    def __call__(self, r):
-        r.headers["authorization"] = "Bearer " + self.token
-        return r
+class RequestsTransport(Transport):
+    name = "requests"
+    TRANSIENT_ERRORS = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
 
-
-class SyncHttpClient(AbstractHttpClient):
-    def __init__(self, client_id, client_secret):
-        self._client_id = client_id
-        self._client_secret = client_secret
+    def __init__(self, pool=None):
+        pool = pool or PoolConfig()
         self._session = requests.Session()
-        self._auth = None
-        self.creds = {
-            "access_token": None,
-            "expires_in": None,
-            "refresh_token": None,
-            "refresh_token_expires_in": None,
-            "resource_owner": None,
-        }
+        self._timeout = (pool.connect_timeout, pool.read_timeout)
+
+        if pool.size is not None:
+            adapter = HTTPAdapter(pool_connections=pool.size, pool_maxsize=pool.size)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def send(self, method, url, headers=None, params=None, data=None):
+        if is_stream(data) and stream_size(data) is None:
+            # requests only sends bodies of unknown length chunked if they are iterators
+            data = iter_file(data)
+
+        resp = self._session.request(
+            method,
+            url,
+            headers=headers,
+            params=params,
+            data=data,
+            timeout=self._timeout,
+        )
+        return TransportResponse(
+            resp.status_code, resp.headers, resp.content, resp.encoding
+        )
+
+    @contextlib.contextmanager
+    def stream(self, method, url, headers=None, chunk_size=64 * 1024):
+        with self._session.request(
+            method, url, headers=headers, stream=True, timeout=self._timeout
+        ) as resp:
+            yield StreamedResponse(
+                resp.status_code, resp.headers, resp.iter_content(chunk_size)
+            )
 
     def close(self):
         self._session.close()
 
+
+class SyncHttpClient(AbstractHttpClient):
+    # transport name -> "module:class"
+    TRANSPORTS = {
+        "requests": "gfypy.http.sync_http:RequestsTransport",
+        "httpx": "gfypy.http.httpx_transport:HttpxTransport",
+    }
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        rate_limits=None,
+        retry_policy=None,
+        response_cache=None,
+        pool=None,
+        codec=None,
+        metrics=None,
+        transport="requests",
+    ):
+        super().__init__(
+            client_id, client_secret, retry_policy, response_cache, codec, metrics
+        )
+        self._transport = load_transport(transport, self.TRANSPORTS, pool=pool)
+        self._rate_limiter = RateLimiter(rate_limits)
+        # requests from several threads refresh the token only once
+        self._refresh_lock = threading.Lock()
+
+    def close(self):
+        self._transport.close()
+
     def request(self, route, **kwargs):
         no_auth = kwargs.pop("no_auth", False)
         refresh = kwargs.pop("refresh", True)
+        cache = kwargs.pop("cache", False)
+        # cached routes that a successful request changes
+        invalidate = kwargs.pop("invalidate", ())
+        self._encode_json(kwargs)
 
-        if self._auth is not None and not no_auth:
-            resp = self._session.request(
-                route.method, route.url, **kwargs, auth=self._auth
-            )
-        else:
-            resp = self._session.request(route.method, route.url, **kwargs)
+        cache_key, cached = self._cache_lookup(route, kwargs) if cache else (None, None)
+        if cached is not None and cached.fresh:
+            return cached.content
 
-        content_type = resp.headers.get("content-type")
+        if not no_auth and self.token_expiring:
+            self._refresh_once(self._token)
+        token = self._token
 
-        if content_type == "application/json":
-            content = resp.json()
-        else:
-            content = resp.text
+        for attempt in itertools.count():
+            self._rate_limiter.acquire(route)
+            self._retry_policy.record_request()
+
+            try:
+                resp = self._send(route, no_auth, kwargs)
+            except self._transport.TRANSIENT_ERRORS:
+                if not self._should_retry(route, kwargs, attempt):
+                    raise
+
+                time.sleep(self._retry_policy.delay(attempt))
+                continue
+
+            if (
+                resp.status == 429
+                and attempt < self.MAX_THROTTLED_RETRIES
+                and self._rewind(kwargs)
+            ):
+                self.metrics.count("throttled", route)
+                self._rate_limiter.throttled(route, resp.headers, attempt)
+                continue
+
+            self._rate_limiter.update(route, resp.headers)
+
+            if resp.status in self._retry_policy.RETRY_STATUSES and self._should_retry(
+                route, kwargs, attempt
+            ):
+                time.sleep(self._retry_policy.delay(attempt))
+                continue
+
+            break
+
+        if cached is not None and resp.status == 304:
+            return self._cache_revalidated(route, cached)
 
-        if 200 <= resp.status_code < 300:
+        content = self._decode(resp.headers, resp.body, resp.encoding)
+
+        if 200 <= resp.status < 300:
+            self._cache_store(cache_key, content, resp.headers, invalidate)
             return content
-        elif resp.status_code in [401, 403]:
-            if refresh:
+        elif resp.status in [401, 403]:
+            if refresh and self._rewind(kwargs):
                 # try to refresh the oauth token in case it's become invalid
-                self.refresh_oauth_token()
+                self._refresh_once(token)
 
-                return self.request(route, **kwargs, refresh=False)
+                return self.request(
+                    route,
+                    **kwargs,
+                    no_auth=no_auth,
+                    refresh=False,
+                    cache=cache,
+                    invalidate=invalidate,
+                )
             else:
                 if "message" in content:
-                    raise GfypyAuthException(content["message"], resp.status_code, None)
+                    raise GfypyAuthException(content["message"], resp.status, None)
                 else:
                     raise GfypyAuthException(
                         content["errorMessage"]["description"],
-                        resp.status_code,
+                        resp.status,
                         content["errorMessage"]["code"],
                     )
         else:
             raise GfypyApiException(
                 content["errorMessage"] if "message" in content else content,
-                resp.status_code,
+                resp.status,
             )
 
+    def _send(self, route, no_auth, kwargs):
+        started = self.metrics.start(route)
+        # a body is only counted once it has been answered, since a failed attempt is rewound and sent again
+        status, received, sent = "error", 0, 0
+
+        try:
+            resp = self._transport.send(
+                route.method,
+                route.url,
+                headers=self._request_headers(no_auth, kwargs),
+                params=kwargs.get("params"),
+                data=kwargs.get("data"),
+            )
+
+            status, received = resp.status, len(resp.body)
+            sent = self._body_size(kwargs)
+            return resp
+        finally:
+            self.metrics.finish(route, started, status, received, sent)
+
+    def download(self, url, path, size=None, md5=None, chunk_size=CHUNK_SIZE):
+        """
+        Streams url to path chunk by chunk, so memory use doesn't depend on the size of the file, and returns
+        the path. An interrupted transfer is resumed with a Range request, by this call or by a later one for
+        the same path. size and md5 are verified if they are given.
+        """
+        download = PartialDownload(path, size, md5)
+        if download.complete:
+            return download.path
+
+        route = MediaRoute(url)
+        attempt = 0
+        while True:
+            offset, error = download.offset, None
+
+            try:
+                if self._receive(route, download, chunk_size):
+                    return download.finish()
+            except self._transport.TRANSIENT_ERRORS as e:
+                error = e
+            except GfypyApiException as e:
+                if e.status_code not in self._retry_policy.RETRY_STATUSES:
+                    raise
+                error = e
+            finally:
+                download.close()
+
+            # only attempts that received nothing count against the retries
+            if download.offset > offset:
+                attempt = 0
+
+            if not self._should_retry(route, {}, attempt):
+                if error is not None:
+                    raise error
+                raise GfypyException(
+                    f"The download of {url} ended after {download.offset} of {size} bytes."
+                )
+
+            time.sleep(self._retry_policy.delay(attempt))
+            attempt += 1
+
+    def _receive(self, route, download, chunk_size):
+        """
+        Sends one request for what is missing of download. Returns False if the transfer ended early.
+        """
+        started = self.metrics.start(route)
+        status, received = "error", download.received
+
+        try:
+            with self._transport.stream(
+                route.method, route.url, download.request_headers(), chunk_size
+            ) as resp:
+                status = resp.status
+
+                if download.start(resp.status, resp.headers):
+                    for chunk in resp.chunks:
+                        download.write(chunk)
+        finally:
+            self.metrics.finish(route, started, status, download.received - received, 0)
+
+        return not download.incomplete
+
+    def warm_up(self, urls, connections=1):
+        """
+        Opens connections to the hosts of urls ahead of the first requests, so those don't wait for DNS, TCP
+        and TLS. Failures are only logged, since the requests will connect on their own anyway.
+        """
+        targets = [url for url in urls for _ in range(connections)]
+
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            list(executor.map(self._open_connection, targets))
+
+    def _open_connection(self, url):
+        try:
+            self._transport.send("HEAD", url)
+            self.metrics.count("warm_up_connections")
+        except Exception as e:
+            logger.debug("Warming up a connection to %s failed: %s", url, e)
+
+    def _refresh_once(self, token):
+        """
+        Refreshes the access token unless another request has already replaced the given one.
+        Concurrent callers wait for the refresh that is in progress instead of starting their own.
+        """
+        with self._refresh_lock:
+            if token == self._token:
+                self.refresh_credentials()
+
+    def refresh_credentials(self):
+        """
+        Refreshes the access token. With a credential store, only one process refreshes at a time, and
+        tokens another process has refreshed in the meantime are picked up instead.
+        """
+        if self.credential_store is None:
+            return self.refresh_oauth_token()
+
+        with self.credential_store.lock():
+            if not self._adopt_stored_creds():
+                self.refresh_oauth_token()
+
     def get_oauth_token(self, code):
         payload = {
             "code": code,
@@ -84,14 +319,9 @@ class SyncHttpClient(AbstractHttpClient):
             "redirect_uri": REDIRECT_URI,
         }
 
-        resp = self.request(
-            Route("POST", "/oauth/token"),
-            data=json.dumps(payload),
-            headers={"content-type": "application/json"},
-        )
+        resp = self._oauth_token_request(payload)
 
-        self.creds = resp
-        self.auth = resp["access_token"]
+        self._set_token(resp)
 
     def refresh_oauth_token(self, **kwargs):
         payload = {
@@ -101,20 +331,7 @@ class SyncHttpClient(AbstractHttpClient):
             "grant_type": "refresh",
         }
 
-        resp = self.request(
-            Route("POST", "/oauth/token"),
-            data=json.dumps(payload),
-            headers={"content-type": "application/json"},
-            **kwargs,
-        )
-
-        self.creds = resp
-        self.auth = resp["access_token"]
-
-    @property
-    def auth(self):
-        return self._auth
+        resp = self._oauth_token_request(payload, **kwargs)
+        self.metrics.count("token_refreshes")
 
-    @auth.setter
-    def auth(self, token):
-        self._auth = BearerAuth(token)
+        self._set_token(resp)
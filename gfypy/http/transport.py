@@ -0,0 +1,133 @@
+import importlib
+
+from gfypy.exceptions import GfypyException
+
+
+class TransportResponse:
+    """
+    A response that has been read completely. headers are case-insensitive, like those of every backend.
+    """
+
+    __slots__ = ("status", "headers", "body", "encoding")
+
+    def __init__(self, status, headers, body, encoding=None):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+
+
+class StreamedResponse:
+    """
+    A response whose body hasn't been read yet. chunks yields it in pieces of at most the requested size; it
+    is an async iterator for the async client.
+    """
+
+    __slots__ = ("status", "headers", "chunks")
+
+    def __init__(self, status, headers, chunks):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+
+
+class Transport:
+    """
+    Sends requests for an HTTP client. Transports only move bytes: authentication, retries, rate limiting and
+    decoding are up to the client, so that every backend behaves the same.
+    send(method, url, headers, params, data) returns a TransportResponse and is a coroutine for the async
+    client. stream(method, url, headers, chunk_size) is a context manager, or an async one for the async
+    client, that yields a StreamedResponse, so that large bodies don't have to fit into memory.
+    TRANSIENT_ERRORS are the exceptions after which a request may be retried.
+    """
+
+    name = None
+    TRANSIENT_ERRORS = ()
+
+    def send(self, method, url, headers=None, params=None, data=None):
+        raise NotImplementedError
+
+    def stream(self, method, url, headers=None, chunk_size=64 * 1024):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+def load_transport(transport, transports, **options):
+    """
+    Returns the transport instance as is, or creates the one with the given name from transports, a dict of
+    names to "module:class" paths. The module is only imported now, so optional backends cost nothing
+    unless they are used.
+    """
+    if not isinstance(transport, str):
+        return transport
+
+    try:
+        module_name, _, class_name = transports[transport].partition(":")
+    except KeyError:
+        raise GfypyException(
+            f"Unknown transport {transport}. Available: {', '.join(transports)}."
+        )
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise GfypyException(
+            f"The {transport} transport needs a package that is not installed: {e.name}."
+        )
+
+    return getattr(module, class_name)(**options)
+
+
+def is_stream(data):
+    return hasattr(data, "read")
+
+
+def stream_size(data):
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def stream_headers(headers, data):
+    """
+    Adds the length of a streamed body if it is known, so that it isn't sent chunked.
+    """
+    size = stream_size(data)
+    if size is None:
+        return headers
+
+    return {**(headers or {}), "content-length": str(size)}
+
+
+def async_body(headers, data):
+    """
+    Turns a streamed body into an async iterable that async backends can send without blocking the loop.
+    """
+    if hasattr(data, "__aiter__"):
+        return stream_headers(headers, data), data.__aiter__()
+    elif is_stream(data):
+        return stream_headers(headers, data), aiter_file(data)
+
+    return headers, data
+
+
+def iter_file(file, chunk_size=64 * 1024):
+    return iter(lambda: file.read(chunk_size), b"")
+
+
+async def aiter_file(file, chunk_size=64 * 1024):
+    """
+    Streams a file-like request body, reading it off the event loop.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    while True:
+        chunk = await loop.run_in_executor(None, file.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,41 @@
+import threading
+from pathlib import Path
+
+
+class BulkJournal:
+    """
+    Appends the id of every gfy a bulk operation has finished to a file, so that running the same operation
+    with the same journal again skips them. Lines are prefixed with the operation, which allows several
+    operations to share one journal.
+    """
+
+    def __init__(self, path, operation):
+        self.path = Path(path)
+        self.operation = operation
+        self._done = set()
+        self._lock = threading.Lock()
+
+        try:
+            with open(self.path, "r") as journal_file:
+                for line in journal_file:
+                    operation, _, gfy_id = line.rstrip("\n").partition(" ")
+                    if operation == self.operation:
+                        self._done.add(gfy_id)
+        except FileNotFoundError:
+            pass
+
+        self._file = open(self.path, "a")
+
+    def __contains__(self, gfy_id):
+        return gfy_id in self._done
+
+    def record(self, gfy_id):
+        with self._lock:
+            self._done.add(gfy_id)
+            self._file.write(f"{self.operation} {gfy_id}\n")
+            # an interrupted run must not lose what it has already done
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,60 @@
+import typing
+from dataclasses import dataclass, field
+
+from .gfy import Gfy
+
+
+@dataclass
+class UploadResult:
+    item: typing.Any
+    gfy: typing.Optional[Gfy] = None
+    error: typing.Optional[BaseException] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class DownloadResult:
+    item: typing.Any
+    path: typing.Optional[str] = None
+    error: typing.Optional[BaseException] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class BulkResult:
+    item: typing.Any
+    error: typing.Optional[BaseException] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class BulkReport:
+    """
+    The outcome of a bulk operation. results are in the order the items finished; skipped holds the items a
+    previous run has already done according to the journal.
+    """
+
+    operation: str
+    results: typing.List[BulkResult] = field(default_factory=list)
+    skipped: typing.List[typing.Any] = field(default_factory=list)
+
+    @property
+    def succeeded(self):
+        return [result.item for result in self.results if result.ok]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results)
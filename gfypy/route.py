@@ -3,9 +3,11 @@ from urllib.parse import quote
 
 class Route:
     BASE = "https://api.gfycat.com/v1"
+    family = "api"
 
     def __init__(self, method, path, **parameters):
         self.method = method
+        # the unformatted path, which identifies the route in metrics
         self.path = path
         url = self.BASE + self.path
         if parameters:
@@ -18,13 +20,35 @@ class Route:
         else:
             self.url = url
 
+    @property
+    def template(self):
+        return self.path
+
 
 class CustomRoute:
-    def __init__(self, method, base, path=None):
+    def __init__(self, method, base, path=None, family=None):
         self.method = method
+        self.family = family
         self.base = base
         self.path = path
         if path is not None:
             self.url = self.base + self.path
         else:
             self.url = self.base
+
+    @property
+    def template(self):
+        return self.url
+
+
+class MediaRoute(CustomRoute):
+    """
+    A media file on gfycat's CDN. All of them share one route in the metrics.
+    """
+
+    def __init__(self, url):
+        super().__init__("GET", url, family="media")
+
+    @property
+    def template(self):
+        return "{media}"
@@ -26,14 +26,18 @@ setup(
         "License :: OSI Approved :: MIT License",
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
     ],
     keywords=["gfycat api wrapper"],
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "tests"]),
+    python_requires=">=3.7",
     install_requires=dependencies,
     setup_requires=dependencies,
-    extras_require={"async": ["aiohttp"]},
+    extras_require={
+        "async": ["aiohttp"],
+        "speedups": ["orjson"],
+        "http2": ["httpx[http2]"],
+    },
     scripts=["bin/gfy-uploader"],
 )
@@ -0,0 +1,53 @@
+"""
+Clients that talk to the fake Gfycat API from the benchmarks, so that tests can run without credentials.
+"""
+import contextlib
+import os
+import tempfile
+
+from gfypy import AsyncGfypy, Gfypy
+
+from benchmarks.fake_api import FakeGfycatApi, point_clients_at, write_creds
+
+
+@contextlib.contextmanager
+def fake_sync_client(**kwargs):
+    """
+    Yields a fake API served from a background thread and an authenticated Gfypy pointed at it. Further
+    kwargs are passed to Gfypy.
+    """
+    api = FakeGfycatApi(media_size=1024)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, api.run_in_thread(), point_clients_at(
+        api
+    ):
+        creds_file = os.path.join(tmp_dir, "creds.json")
+        write_creds(creds_file)
+        gfypy = Gfypy("client_id", "client_secret", creds_file, **kwargs)
+        gfypy.authenticate()
+        try:
+            yield api, gfypy
+        finally:
+            gfypy.close()
+
+
+@contextlib.asynccontextmanager
+async def fake_async_client(**kwargs):
+    """
+    Like fake_sync_client, with an AsyncGfypy on the running event loop.
+    """
+    api = FakeGfycatApi(media_size=1024)
+    await api.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir, point_clients_at(api):
+            creds_file = os.path.join(tmp_dir, "creds.json")
+            write_creds(creds_file)
+            gfypy = AsyncGfypy("client_id", "client_secret", creds_file, **kwargs)
+            await gfypy.authenticate()
+            try:
+                yield api, gfypy
+            finally:
+                await gfypy.close()
+    finally:
+        await api.stop()
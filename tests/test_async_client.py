@@ -1,4 +1,6 @@
+import asyncio
 import os
+import tempfile
 import time
 import warnings
 
@@ -26,6 +28,12 @@ class TestAsyncGfypy(unittest.IsolatedAsyncioTestCase):
         gfys = await self.gfypy.get_own_feed(limit=-1)
         self.assertGreater(len(gfys), 1)
 
+    async def test_get_own_feed_top_views(self):
+        gfys = await self.gfypy.get_own_feed(limit=-1, sort_by="views")
+        top = await self.gfypy.get_own_feed(limit=-1, sort_by="views", max_results=5)
+
+        self.assertEqual([gfy.gfy_id for gfy in top], [gfy.gfy_id for gfy in gfys[:5]])
+
     async def test_upload_from_file(self):
         title = "This is a test upload"
 
@@ -38,6 +46,40 @@ class TestAsyncGfypy(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(gfy.title, title)
 
+    async def test_upload_from_stream(self):
+        title = "This is a test upload"
+
+        with open("example.mp4", "rb") as file:
+            data = file.read()
+
+        gfy = await self.gfypy.upload_from_bytes(memoryview(data), title=title)
+        self.assertEqual(gfy.title, title)
+
+        async def chunks():
+            for start in range(0, len(data), 64 * 1024):
+                end = start + 64 * 1024
+                yield data[start:end]
+
+        # the size is unknown, so the body is sent chunked
+        gfy = await self.gfypy.upload_from_stream(chunks(), title=title)
+        self.assertEqual(gfy.title, title)
+
+    async def test_upload_many(self):
+        title = "This is a test upload"
+
+        results = [
+            result
+            async for result in self.gfypy.upload_many(
+                ["example.mp4", "does_not_exist.mp4"], concurrency=2, title=title
+            )
+        ]
+        self.assertEqual(len(results), 2)
+
+        by_item = {result.item: result for result in results}
+        self.assertTrue(by_item["example.mp4"].ok)
+        self.assertEqual(by_item["example.mp4"].gfy.title, title)
+        self.assertIsInstance(by_item["does_not_exist.mp4"].error, FileNotFoundError)
+
     async def test_get_me(self):
         username = "gfycat_ux_goat"
 
@@ -52,6 +94,54 @@ class TestAsyncGfypy(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(gfy.title, "This is a test upload")
 
+    async def test_get_gfycat_coalesced(self):
+        gfys = await asyncio.gather(
+            *[self.gfypy.get_gfycat("inexperiencedsneakyacouchi") for _ in range(5)]
+        )
+
+        self.assertEqual({gfy.title for gfy in gfys}, {"This is a test upload"})
+        self.assertEqual(self.gfypy.stats["coalesced"], 4)
+
+    async def test_download_many(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = [
+                result
+                async for result in self.gfypy.download_many(
+                    ["inexperiencedsneakyacouchi"], directory
+                )
+            ]
+
+            self.assertTrue(results[0].ok)
+            self.assertEqual(os.path.dirname(results[0].path), directory)
+
+    async def test_get_followers(self):
+        followers = await self.gfypy.get_followers()
+        users = await self.gfypy.get_followers(fetch_userdata=True)
+
+        self.assertEqual(
+            [user["userid"] for user in users],
+            [follower["follower_id"] for follower in followers],
+        )
+
+    async def test_httpx_transport(self):
+        gfypy = AsyncGfypy(CLIENT_ID, CLIENT_SECRET, "../creds.json", transport="httpx")
+        await gfypy.authenticate()
+
+        try:
+            gfys = await asyncio.gather(
+                *[
+                    gfypy.get_gfycat(gfy_id)
+                    for gfy_id in ("inexperiencedsneakyacouchi", "gaseousbelovedgar")
+                ]
+            )
+        finally:
+            await gfypy.close()
+
+        self.assertEqual(
+            [gfy.gfy_id for gfy in gfys],
+            ["inexperiencedsneakyacouchi", "gaseousbelovedgar"],
+        )
+
 
 class TestAsyncGfypyAuth(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
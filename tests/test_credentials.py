@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from gfypy.credentials import CredentialStore
+
+
+def increment(path, times):
+    store = CredentialStore(path)
+
+    for _ in range(times):
+        with store.lock():
+            creds = store.load()
+            creds["refreshes"] += 1
+            store.save(creds)
+
+
+class TestCredentialStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "creds.json")
+        self.store = CredentialStore(self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_missing(self):
+        self.assertIsNone(self.store.load())
+
+    def test_save_and_load(self):
+        self.store.save({"access_token": "a"})
+        self.store.save({"access_token": "b"})
+
+        self.assertEqual(self.store.load(), {"access_token": "b"})
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["creds.json"])
+
+    def test_failed_save_keeps_the_old_file(self):
+        self.store.save({"access_token": "a"})
+
+        with self.assertRaises(TypeError):
+            self.store.save({"access_token": object()})
+
+        self.assertEqual(self.store.load(), {"access_token": "a"})
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["creds.json"])
+
+    def test_lock_serializes_threads(self):
+        self.store.save({"refreshes": 0})
+
+        threads = [
+            threading.Thread(target=increment, args=(self.path, 20)) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.store.load()["refreshes"], 80)
+
+    def test_lock_serializes_processes(self):
+        self.store.save({"refreshes": 0})
+
+        processes = [
+            multiprocessing.Process(target=increment, args=(self.path, 20))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([p.exitcode for p in processes], [0] * 4)
+        self.assertEqual(self.store.load()["refreshes"], 80)
+
+    def test_lock_is_released_after_an_error(self):
+        with self.assertRaises(ValueError):
+            with self.store.lock():
+                raise ValueError
+
+        thread = threading.Thread(target=increment, args=(self.path, 1))
+        self.store.save({"refreshes": 0})
+        thread.start()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.store.load()["refreshes"], 1)
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from gfypy.feed_cache import FeedCache
+
+from benchmarks.fake_api import fake_gfy
+from tests.offline import fake_async_client, fake_sync_client
+
+
+def page(numbers):
+    return [fake_gfy(f"gfy{number}", number) for number in numbers]
+
+
+def sync_pages(cache, pages, full=None):
+    """
+    Runs a sync over pages like a client would and returns it.
+    """
+    sync = cache.sync(full=full)
+    for payloads in pages:
+        if not sync.add_page(payloads):
+            break
+    sync.finish()
+    return sync
+
+
+class TestFeedCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "feed.db")
+        self.cache = FeedCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def cached_ids(self, user_id=None):
+        return [gfy.gfy_id for gfy in self.cache.gfys(None, user_id)]
+
+    def test_first_sync_is_full(self):
+        sync = sync_pages(self.cache, [page(range(9, 4, -1)), page(range(4, -1, -1))])
+
+        self.assertTrue(sync.full)
+        self.assertEqual(sync.stored, 10)
+        self.assertEqual(self.cached_ids(), [f"gfy{i}" for i in range(9, -1, -1)])
+        self.assertIsNotNone(self.cache.last_full_sync())
+
+    def test_incremental_sync_stops_at_known_gfys(self):
+        sync_pages(self.cache, [page(range(4, -1, -1))])
+
+        pages = [page(range(7, 2, -1)), page(range(2, -1, -1))]
+        sync = sync_pages(self.cache, pages)
+
+        self.assertFalse(sync.full)
+        self.assertEqual(sync.stored, 3)
+        self.assertEqual(self.cached_ids(), [f"gfy{i}" for i in range(7, -1, -1)])
+
+    def test_incremental_sync_keeps_mutable_fields(self):
+        sync_pages(self.cache, [page(range(3))])
+
+        changed = page(range(3))
+        changed[0]["views"] = 1000
+        sync_pages(self.cache, [changed])
+
+        self.assertNotEqual(self.cache.gfys(None)[-1].views, 1000)
+
+    def test_full_sync_refreshes_and_removes_deleted_gfys(self):
+        sync_pages(self.cache, [page(range(4, -1, -1))])
+
+        changed = page([4, 3, 1, 0])
+        changed[0]["views"] = 1000
+        sync = sync_pages(self.cache, [changed], full=True)
+
+        self.assertTrue(sync.full)
+        self.assertEqual(self.cached_ids(), ["gfy4", "gfy3", "gfy1", "gfy0"])
+        self.assertEqual(self.cache.gfys(None)[0].views, 1000)
+
+    def test_full_sync_after_refresh_interval(self):
+        self.cache.refresh_interval = 60
+        sync_pages(self.cache, [page(range(3))])
+        self.assertFalse(self.cache.sync().full)
+
+        self.cache.refresh_interval = 0
+        self.assertTrue(self.cache.sync().full)
+
+    def test_feeds_are_separate(self):
+        sync = self.cache.sync("someone")
+        sync.add_page(page(range(3)))
+        sync.finish()
+
+        self.assertEqual(self.cached_ids(), [])
+        self.assertEqual(len(self.cached_ids("someone")), 3)
+        self.assertIsNone(self.cache.last_full_sync())
+
+    def test_persists(self):
+        sync_pages(self.cache, [page(range(3))])
+        self.cache.close()
+        self.cache = FeedCache(self.path)
+
+        self.assertEqual(len(self.cached_ids()), 3)
+        self.assertLessEqual(self.cache.last_full_sync(), time.time())
+
+
+class TestClientFeedCache(unittest.TestCase):
+    def test_sync_client(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, fake_sync_client(
+            feed_cache=os.path.join(tmp_dir, "feed.db")
+        ) as (api, gfypy):
+            api.feed_size = 250
+            self.assertEqual(len(gfypy.get_own_feed(limit=-1)), 250)
+            self.assertEqual(api.counts["feed"], 3)
+
+            api.feed_size = 260
+            gfys = gfypy.get_own_feed(limit=-1)
+
+            self.assertEqual(len(gfys), 260)
+            self.assertEqual(gfys[0].gfy_id, "gfy259")
+            # only the newest page had to be fetched
+            self.assertEqual(api.counts["feed"], 4)
+            self.assertEqual(len(gfypy.get_own_feed(limit=-1, use_cache=False)), 260)
+
+    def test_async_client(self):
+        async def run():
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                async with fake_async_client(
+                    feed_cache=os.path.join(tmp_dir, "feed.db")
+                ) as (api, gfypy):
+                    api.feed_size = 250
+                    self.assertEqual(await gfypy.sync_feed(), 250)
+
+                    api.feed_size = 260
+                    gfys = await gfypy.get_own_feed(limit=-1)
+
+                    self.assertEqual(len(gfys), 260)
+                    self.assertEqual(gfys[0].gfy_id, "gfy259")
+                    self.assertEqual(api.counts["feed"], 4)
+
+        asyncio.run(run())
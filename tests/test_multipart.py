@@ -0,0 +1,149 @@
+import asyncio
+import email.parser
+import io
+import os
+import tempfile
+import unittest
+
+from gfypy.http.multipart import MultipartEncoder
+
+VIDEO = bytes(range(256)) * 1000
+
+
+class Unseekable(io.RawIOBase):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+def parse(encoder, body):
+    message = email.parser.BytesParser().parsebytes(
+        f"Content-Type: {encoder.content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(
+            decode=True
+        )
+        for part in message.get_payload()
+    }
+
+
+async def read_async(encoder):
+    return b"".join([chunk async for chunk in encoder])
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "video.mp4")
+        with open(self.path, "wb") as video_file:
+            video_file.write(VIDEO)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assertBody(self, encoder, body):
+        self.assertEqual(len(body), len(encoder))
+        self.assertEqual(parse(encoder, body), {"key": b"fakekey", "file": VIDEO})
+
+    def test_file(self):
+        with open(self.path, "rb") as video_file:
+            encoder = MultipartEncoder(
+                {"key": "fakekey"}, {"file": ("key", video_file)}
+            )
+            self.assertBody(encoder, b"".join(encoder))
+
+    def test_bytes(self):
+        encoder = MultipartEncoder(
+            {"key": "fakekey"}, {"file": ("key", memoryview(VIDEO))}
+        )
+        self.assertBody(encoder, encoder.read())
+
+    def test_read_in_small_chunks(self):
+        with open(self.path, "rb") as video_file:
+            encoder = MultipartEncoder(
+                {"key": "fakekey"}, {"file": ("key", video_file)}
+            )
+            body = b"".join(iter(lambda: encoder.read(1000), b""))
+
+        self.assertBody(encoder, body)
+
+    def test_length_of_a_file_read_from_the_middle(self):
+        with open(self.path, "rb") as video_file:
+            video_file.seek(1000)
+            encoder = MultipartEncoder(
+                {"key": "fakekey"}, {"file": ("key", video_file)}
+            )
+
+            self.assertEqual(len(encoder.read()), len(encoder))
+
+    def test_rewind(self):
+        with open(self.path, "rb") as video_file:
+            encoder = MultipartEncoder(
+                {"key": "fakekey"}, {"file": ("key", video_file)}
+            )
+            encoder.read(100000)
+
+            self.assertTrue(encoder.rewind())
+            self.assertEqual(encoder.bytes_read, 0)
+            self.assertBody(encoder, encoder.read())
+
+    def test_unseekable_stream(self):
+        encoder = MultipartEncoder(
+            {"key": "fakekey"}, {"file": ("key", Unseekable(VIDEO))}
+        )
+
+        with self.assertRaises(TypeError):
+            len(encoder)
+        # nothing has been sent yet, so it can still start over
+        self.assertTrue(encoder.rewind())
+
+        body = encoder.read()
+        self.assertEqual(parse(encoder, body), {"key": b"fakekey", "file": VIDEO})
+        self.assertFalse(encoder.rewind())
+
+    def test_unseekable_stream_with_size(self):
+        encoder = MultipartEncoder(
+            {"key": "fakekey"}, {"file": ("key", Unseekable(VIDEO), len(VIDEO))}
+        )
+        self.assertBody(encoder, encoder.read())
+
+    def test_progress_callback(self):
+        progress = []
+        encoder = MultipartEncoder(
+            {"key": "fakekey"},
+            {"file": ("key", VIDEO)},
+            callback=lambda read, total: progress.append((read, total)),
+        )
+        list(encoder)
+
+        self.assertEqual(progress[-1], (len(encoder), len(encoder)))
+        self.assertEqual(progress, sorted(progress))
+
+    def test_async_iteration(self):
+        with open(self.path, "rb") as video_file:
+            encoder = MultipartEncoder(
+                {"key": "fakekey"}, {"file": ("key", video_file)}
+            )
+            self.assertBody(encoder, asyncio.run(read_async(encoder)))
+
+            self.assertTrue(encoder.rewind())
+            self.assertBody(encoder, asyncio.run(read_async(encoder)))
+
+    def test_async_iterable_source(self):
+        async def chunks():
+            for start in range(0, len(VIDEO), 4096):
+                end = start + 4096
+                yield VIDEO[start:end]
+
+        encoder = MultipartEncoder(
+            {"key": "fakekey"}, {"file": ("key", chunks(), len(VIDEO))}
+        )
+
+        self.assertBody(encoder, asyncio.run(read_async(encoder)))
+        self.assertFalse(encoder.rewind())
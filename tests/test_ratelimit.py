@@ -0,0 +1,109 @@
+import time
+import unittest
+from email.utils import formatdate
+
+from gfypy.http.ratelimit import RateLimiter, TokenBucket, parse_retry_after
+from gfypy.route import CustomRoute, Route
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, capacity=3)
+
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        # reservations queue up behind each other
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_pause(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.5)
+
+        self.assertAlmostEqual(bucket.reserve(), 0.51, places=2)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after({"retry-after": "2.5"}), 2.5)
+        self.assertEqual(parse_retry_after({"retry-after": "-1"}), 0.0)
+
+    def test_http_date(self):
+        delay = parse_retry_after({"retry-after": formatdate(time.time() + 30)})
+        self.assertAlmostEqual(delay, 30, delta=1.5)
+
+    def test_rate_limit_headers(self):
+        self.assertEqual(
+            parse_retry_after({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "3"}),
+            3.0,
+        )
+        self.assertAlmostEqual(
+            parse_retry_after(
+                {
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(time.time() + 5),
+                }
+            ),
+            5,
+            delta=1,
+        )
+        self.assertIsNone(
+            parse_retry_after({"x-ratelimit-remaining": "4", "x-ratelimit-reset": "3"})
+        )
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after({}))
+        self.assertIsNone(parse_retry_after({"retry-after": "soon"}))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.route = Route("GET", "/me")
+
+    def assertWaits(self, limiter, seconds):
+        started = time.monotonic()
+        limiter.acquire(self.route)
+        self.assertAlmostEqual(time.monotonic() - started, seconds, delta=0.05)
+
+    def test_unlimited_by_default(self):
+        limiter = RateLimiter()
+
+        for _ in range(100):
+            self.assertWaits(limiter, 0)
+
+    def test_limit(self):
+        limiter = RateLimiter({"api": (10, 1)})
+
+        self.assertWaits(limiter, 0)
+        self.assertWaits(limiter, 0.1)
+
+    def test_rate_limit_headers_pause_unlimited_family(self):
+        limiter = RateLimiter()
+        limiter.update(
+            self.route, {"x-ratelimit-remaining": "0", "x-ratelimit-reset": "0.2"}
+        )
+
+        self.assertWaits(limiter, 0.2)
+        self.assertWaits(limiter, 0)
+
+    def test_throttled_pauses_limited_family(self):
+        limiter = RateLimiter({"api": (100, 10)})
+        limiter.throttled(self.route, {"retry-after": "0.2"}, 0)
+
+        self.assertWaits(limiter, 0.2)
+
+    def test_throttled_backs_off_without_retry_after(self):
+        limiter = RateLimiter()
+        limiter.DEFAULT_RETRY_AFTER = 0.05
+        limiter.throttled(self.route, {}, 2)
+
+        self.assertWaits(limiter, 0.2)
+
+    def test_families_are_paused_separately(self):
+        limiter = RateLimiter()
+        limiter.update(self.route, {"retry-after": "1"})
+
+        started = time.monotonic()
+        limiter.acquire(
+            CustomRoute("POST", "https://filedrop.gfycat.com/", family="filedrop")
+        )
+        self.assertLess(time.monotonic() - started, 0.05)
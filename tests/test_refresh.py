@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+
+from gfypy import Gfypy
+
+from tests.offline import fake_async_client, fake_sync_client
+
+IDS = [f"gfy{i}" for i in range(16)]
+
+
+class TestSyncRefresh(unittest.TestCase):
+    def test_revoked_token_is_refreshed_once(self):
+        with fake_sync_client(max_workers=8) as (api, gfypy):
+            refreshes = api.counts["oauth_token"]
+            api.latency = 0.02
+            api._tokens.clear()
+
+            gfys = gfypy.get_gfycats(IDS)
+
+            self.assertEqual([gfy.gfy_id for gfy in gfys], IDS)
+            self.assertEqual(api.counts["oauth_token"], refreshes + 1)
+
+    def test_expiring_token_is_refreshed_once(self):
+        with fake_sync_client(max_workers=8) as (api, gfypy):
+            refreshes = api.counts["oauth_token"]
+            gfypy._http._expires_at = 0
+
+            gfypy.get_gfycats(IDS)
+
+            self.assertEqual(api.counts["oauth_token"], refreshes + 1)
+
+    def test_tokens_refreshed_by_another_client_are_adopted(self):
+        with fake_sync_client() as (api, gfypy):
+            other = Gfypy("client_id", "client_secret", gfypy._auth_file_path)
+            other.authenticate()
+            refreshes = api.counts["oauth_token"]
+
+            # the first client's tokens have been replaced by the other's refresh
+            other._http.refresh_credentials()
+            api._tokens.pop(gfypy._http.creds["access_token"])
+
+            gfypy.get_gfycat("gfy1")
+            other.close()
+
+            self.assertEqual(api.counts["oauth_token"], refreshes + 1)
+            self.assertEqual(
+                gfypy._http.creds["access_token"], other._http.creds["access_token"]
+            )
+
+
+class TestAsyncRefresh(unittest.TestCase):
+    def test_revoked_token_is_refreshed_once(self):
+        async def run():
+            async with fake_async_client() as (api, gfypy):
+                refreshes = api.counts["oauth_token"]
+                api.latency = 0.02
+                api._tokens.clear()
+
+                gfys = await asyncio.gather(*(gfypy.get_gfycat(i) for i in IDS))
+
+                self.assertEqual([gfy.gfy_id for gfy in gfys], IDS)
+                self.assertEqual(api.counts["oauth_token"], refreshes + 1)
+
+        asyncio.run(run())
+
+    def test_expiring_token_is_refreshed_once(self):
+        async def run():
+            async with fake_async_client() as (api, gfypy):
+                refreshes = api.counts["oauth_token"]
+                gfypy._http._expires_at = 0
+
+                await asyncio.gather(*(gfypy.get_gfycat(i) for i in IDS))
+
+                self.assertEqual(api.counts["oauth_token"], refreshes + 1)
+
+        asyncio.run(run())
+
+    def test_cancelled_refresh_releases_the_credential_lock(self):
+        async def run():
+            async with fake_async_client() as (api, gfypy):
+                store = gfypy._http.credential_store
+                store.acquire()
+                refresh = asyncio.ensure_future(gfypy._http.refresh_credentials())
+                await asyncio.sleep(0.05)
+                refresh.cancel()
+                store.release()
+
+                with self.assertRaises(asyncio.CancelledError):
+                    await refresh
+
+                # the worker thread took the lock after the cancellation and has to give it back
+                await asyncio.sleep(0.05)
+                await asyncio.wait_for(gfypy._http.refresh_credentials(), 5)
+
+        asyncio.run(run())
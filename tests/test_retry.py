@@ -0,0 +1,89 @@
+import unittest
+
+from gfypy import GfypyApiException, RetryPolicy
+
+from tests.offline import fake_sync_client
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_only_idempotent_methods_are_retried(self):
+        policy = RetryPolicy(max_retries=2)
+
+        for method in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"):
+            self.assertTrue(policy.is_retryable(method, 0), method)
+        self.assertFalse(policy.is_retryable("POST", 0))
+        self.assertFalse(policy.is_retryable("PATCH", 0))
+
+    def test_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+
+        self.assertTrue(policy.is_retryable("GET", 1))
+        self.assertFalse(policy.is_retryable("GET", 2))
+
+    def test_budget(self):
+        policy = RetryPolicy(budget_ratio=0.5, max_budget=2)
+
+        self.assertTrue(policy.withdraw())
+        self.assertTrue(policy.withdraw())
+        self.assertFalse(policy.withdraw())
+
+        # every request refills part of a retry
+        policy.record_request()
+        self.assertFalse(policy.withdraw())
+        policy.record_request()
+        self.assertTrue(policy.withdraw())
+
+    def test_budget_is_capped(self):
+        policy = RetryPolicy(budget_ratio=1, max_budget=1)
+
+        for _ in range(10):
+            policy.record_request()
+
+        self.assertTrue(policy.withdraw())
+        self.assertFalse(policy.withdraw())
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=3)
+
+        for attempt in range(10):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(3, 0.5 * 2 ** attempt))
+
+
+class TestRetries(unittest.TestCase):
+    def test_get_is_retried(self):
+        policy = RetryPolicy(max_retries=2, backoff=0.001)
+
+        with fake_sync_client(retry_policy=policy) as (api, gfypy):
+            api.error_rate = 1.0
+
+            with self.assertRaises(GfypyApiException) as cm:
+                gfypy.get_gfycat("gfy1")
+
+            self.assertEqual(cm.exception.status_code, 503)
+            self.assertEqual(api.counts["injected_503"], 3)
+            self.assertEqual(gfypy.stats["retries"], 2)
+
+    def test_post_is_not_retried(self):
+        policy = RetryPolicy(max_retries=2, backoff=0.001)
+
+        with fake_sync_client(retry_policy=policy) as (api, gfypy):
+            api.error_rate = 1.0
+
+            with self.assertRaises(GfypyApiException):
+                gfypy.upload_from_bytes(b"video", check_upload=False)
+
+            self.assertEqual(api.counts["injected_503"], 1)
+
+    def test_exhausted_budget_stops_retries(self):
+        policy = RetryPolicy(max_retries=5, backoff=0.001, max_budget=1)
+
+        with fake_sync_client(retry_policy=policy) as (api, gfypy):
+            api.error_rate = 1.0
+
+            with self.assertRaises(GfypyApiException):
+                gfypy.get_gfycat("gfy1")
+
+            self.assertEqual(api.counts["injected_503"], 2)
+            self.assertEqual(gfypy.stats["retry_budget_exhausted"], 1)
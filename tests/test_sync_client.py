@@ -1,11 +1,13 @@
+import io
 import logging
 import os
 import sys
+import tempfile
 import time
 import warnings
 
 from conf_test import CLIENT_ID, CLIENT_SECRET
-from gfypy import Gfypy
+from gfypy import Gfypy, PoolConfig, RenditionPolicy, ResponseCache
 
 import unittest
 
@@ -38,6 +40,12 @@ class TestSyncGfypy(unittest.TestCase):
         gfys = self.gfypy.get_own_feed(limit=-1)
         self.assertGreater(len(gfys), 1)
 
+    def test_get_own_feed_top_views(self):
+        gfys = self.gfypy.get_own_feed(limit=-1, sort_by="views")
+        top = self.gfypy.get_own_feed(limit=-1, sort_by="views", max_results=5)
+
+        self.assertEqual([gfy.gfy_id for gfy in top], [gfy.gfy_id for gfy in gfys[:5]])
+
     def test_upload_from_file(self):
         title = "This is a test upload"
 
@@ -50,6 +58,18 @@ class TestSyncGfypy(unittest.TestCase):
         )
         self.assertEqual(gfy.title, title)
 
+    def test_upload_from_stream(self):
+        title = "This is a test upload"
+
+        with open("example.mp4", "rb") as file:
+            data = file.read()
+
+        gfy = self.gfypy.upload_from_bytes(data, title=title)
+        self.assertEqual(gfy.title, title)
+
+        gfy = self.gfypy.upload_from_stream(io.BytesIO(data), title=title)
+        self.assertEqual(gfy.title, title)
+
     def test_get_me(self):
         username = "gfycat_ux_goat"
 
@@ -64,6 +84,67 @@ class TestSyncGfypy(unittest.TestCase):
 
         self.assertEqual(gfy.title, "This is a test upload")
 
+    def test_get_gfycats(self):
+        gfys = self.gfypy.get_gfycats(["inexperiencedsneakyacouchi"] * 3)
+
+        self.assertEqual([gfy.title for gfy in gfys], ["This is a test upload"] * 3)
+
+    def test_bulk_set_title(self):
+        report = self.gfypy.bulk_set_title(
+            ["inexperiencedsneakyacouchi"], "This is a test upload"
+        )
+
+        self.assertTrue(report.ok)
+        self.assertEqual(report.succeeded, ["inexperiencedsneakyacouchi"])
+
+    def test_download(self):
+        gfy = self.gfypy.get_gfycat("inexperiencedsneakyacouchi")
+        policy = RenditionPolicy(formats=("mp4",))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.gfypy.download(gfy, directory, policy)
+
+            self.assertEqual(os.path.basename(path), "inexperiencedsneakyacouchi.mp4")
+            self.assertEqual(os.path.getsize(path), policy.choose(gfy).size)
+
+    def test_metrics(self):
+        self.gfypy.get_gfycat("inexperiencedsneakyacouchi")
+        routes = {
+            (route["method"], route["route"]): route
+            for route in self.gfypy.metrics.snapshot()["routes"]
+        }
+
+        self.assertEqual(routes["GET", "/gfycats/{id}"]["statuses"], {"200": 1})
+        self.assertIn('route="/gfycats/{id}"', self.gfypy.metrics.prometheus())
+
+    def test_get_gfycat_cached(self):
+        gfypy = Gfypy(
+            CLIENT_ID, CLIENT_SECRET, "../creds.json", response_cache=ResponseCache()
+        )
+        gfypy.authenticate()
+
+        first = gfypy.get_gfycat("inexperiencedsneakyacouchi")
+        second = gfypy.get_gfycat("inexperiencedsneakyacouchi")
+        gfypy.close()
+
+        self.assertEqual(first.title, second.title)
+        self.assertEqual(gfypy.stats["cache_hits"], 1)
+
+    def test_warm_up(self):
+        gfypy = Gfypy(
+            CLIENT_ID,
+            CLIENT_SECRET,
+            "../creds.json",
+            pool=PoolConfig(size=4, connect_timeout=10, read_timeout=30),
+        )
+        gfypy.authenticate(warm_up=4)
+
+        gfy = gfypy.get_gfycat("inexperiencedsneakyacouchi")
+        gfypy.close()
+
+        self.assertEqual(gfy.title, "This is a test upload")
+        self.assertEqual(gfypy.stats["warm_up_connections"], 8)
+
 
 class TestSyncGfypyAuth(unittest.TestCase):
     def setUp(self) -> None:
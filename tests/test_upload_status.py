@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from gfypy import GfypyException
+from gfypy.client.backoff import StatusBackoff
+from gfypy.client.poller import UploadStatusPoller
+
+ENCODING = {"task": "encoding"}
+COMPLETE = {"task": "complete"}
+
+
+class TestStatusBackoff(unittest.TestCase):
+    def test_first_delay_grows_with_the_file_size(self):
+        small = StatusBackoff(0).next(ENCODING)
+        large = StatusBackoff(40 * 1024 * 1024).next(ENCODING)
+
+        self.assertLessEqual(small, StatusBackoff.INITIAL_DELAY)
+        self.assertGreater(large, StatusBackoff.INITIAL_DELAY)
+        self.assertLessEqual(large, StatusBackoff.MAX_DELAY)
+
+    def test_delays_back_off_up_to_the_maximum(self):
+        backoff = StatusBackoff()
+        delays = [backoff.next(ENCODING) for _ in range(20)]
+
+        self.assertGreater(delays[-1], StatusBackoff.MAX_DELAY / 2)
+        self.assertLessEqual(max(delays), StatusBackoff.MAX_DELAY)
+
+    def test_not_found_doesnt_back_off(self):
+        backoff = StatusBackoff()
+
+        for _ in range(10):
+            self.assertLessEqual(
+                backoff.next({"task": "NotFoundo"}), StatusBackoff.INITIAL_DELAY
+            )
+
+    def test_estimated_time_shortens_the_delay(self):
+        backoff = StatusBackoff(100 * 1024 * 1024)
+
+        self.assertLessEqual(backoff.next({"task": "encoding", "time": "2"}), 2)
+
+    def test_is_final(self):
+        self.assertTrue(StatusBackoff.is_final(COMPLETE))
+        self.assertTrue(StatusBackoff.is_final({"task": "error"}))
+        self.assertFalse(StatusBackoff.is_final(ENCODING))
+
+    def test_unexpected_status(self):
+        for status in ("<html>", {"gfyname": "key"}, None):
+            with self.assertRaises(GfypyException):
+                StatusBackoff.is_final(status)
+
+
+@mock.patch.multiple(StatusBackoff, INITIAL_DELAY=0.01, MAX_DELAY=0.02)
+class TestUploadStatusPoller(unittest.TestCase):
+    def run_poller(self, statuses, max_check_time=5):
+        """
+        Waits for every key of statuses, whose values are the statuses its checks return in turn; the last
+        one repeats. Returns the outcome of each wait and how often each key has been checked.
+        """
+        checks = {key: 0 for key in statuses}
+
+        async def check_status(key):
+            checks[key] += 1
+            status = statuses[key][min(checks[key], len(statuses[key])) - 1]
+            if isinstance(status, Exception):
+                raise status
+            return status
+
+        async def run():
+            poller = UploadStatusPoller(check_status, max_check_time)
+            results = await asyncio.gather(
+                *(poller.wait(key) for key in statuses), return_exceptions=True
+            )
+            await poller.close()
+            return dict(zip(statuses, results))
+
+        return asyncio.run(run()), checks
+
+    def test_resolves_final_statuses(self):
+        results, checks = self.run_poller(
+            {"a": [COMPLETE], "b": [ENCODING, ENCODING, COMPLETE]}
+        )
+
+        self.assertEqual(results, {"a": COMPLETE, "b": COMPLETE})
+        self.assertEqual(checks, {"a": 1, "b": 3})
+
+    def test_failed_check_only_fails_its_upload(self):
+        results, _ = self.run_poller(
+            {
+                "a": [ENCODING, COMPLETE],
+                "b": ["<html>"],
+                "c": [ConnectionError()],
+            }
+        )
+
+        self.assertEqual(results["a"], COMPLETE)
+        self.assertIsInstance(results["b"], GfypyException)
+        self.assertIsInstance(results["c"], ConnectionError)
+
+    def test_gives_up_after_max_check_time(self):
+        results, checks = self.run_poller({"a": [ENCODING]}, max_check_time=0.1)
+
+        self.assertEqual(results, {"a": ENCODING})
+        self.assertGreater(checks["a"], 1)
+
+    def test_close_cancels_waiting_uploads(self):
+        async def check_status(key):
+            return ENCODING
+
+        async def run():
+            poller = UploadStatusPoller(check_status, 5)
+            waiting = poller.wait("a")
+            await asyncio.sleep(0.05)
+            await poller.close()
+            return waiting
+
+        self.assertTrue(asyncio.run(run()).cancelled())